@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+    Async highlighting
+    ~~~~~~~~~~~~~~~~~~
+
+    * awaitable highlight and async token iterator for asyncio services --- class AsyncHighlighter
+"""
+import pygments
+from pygments.token import string_to_tokentype
+from pygments.util import ClassNotFound
+
+from pygments_red import detect
+from pygments_red.styles import GithubCustom1Style, get_formatter, _freeze
+
+import asyncio
+import itertools
+import threading
+import concurrent.futures
+
+
+class Overloaded(RuntimeError):
+    """
+    Raised by AsyncHighlighter when `max_pending` requests are already in
+    flight, so that a service can shed load (e.g. answer 503) instead of
+    queueing without bound.
+    """
+
+class _Cancelled(Exception):
+    pass
+
+# ----------------------------------------------------
+#  executor side: one warm lexer per class (per process for process pools),
+#  looked up by alias
+
+_worker = {}
+
+def _init_worker():
+    by_class = {}
+    lexers = {}
+    for alias, cls in detect.index()['aliases'].items():
+        if cls not in by_class:
+            by_class[cls] = cls()
+        lexers[alias] = by_class[cls]
+    _worker['lexers'] = lexers
+    return lexers
+
+def _lexer(lexer):
+    if not isinstance(lexer, str):
+        return lexer
+    lexers = _worker.get('lexers') or _init_worker()
+    try:
+        return lexers[lexer.lower()]
+    except KeyError:
+        raise ClassNotFound('no pygments_red lexer for alias %r found' % lexer)
+
+def _checked(tokens, cancelled):
+    # checks for cancellation every 1024 tokens
+    for i, tok in enumerate(tokens):
+        if not i & 1023 and cancelled.is_set():
+            raise _Cancelled()
+        yield tok
+
+def _highlight(lexer, text, spec, cancelled=None):
+    name, style, options = spec
+    tokens = _lexer(lexer).get_tokens(text)
+    if cancelled is not None:
+        tokens = _checked(tokens, cancelled)
+    return pygments.format(tokens, get_formatter(name, style, **dict(options)))
+
+def _start(lexer, text, cancelled=None):
+    return iter(_lexer(lexer).get_tokens(text))
+
+def _batch(tokens, size, cancelled=None):
+    return list(itertools.islice(tokens, size))
+
+def _lex(lexer, text, cancelled=None):
+    # token types go back by name (interned, so they pickle once)
+    names = {}
+    ans = []
+    for token, value in _lexer(lexer).get_tokens(text):
+        name = names.get(token)
+        if name is None:
+            name = names[token] = str(token)
+        ans.append((name, value))
+    return ans
+
+# ----------------------------------------------------
+
+class AsyncHighlighter(object):
+    """
+    Runs pygments_red lexing and formatting off the event loop.
+
+        async with AsyncHighlighter('process', workers=4) as hl:
+            html = await hl.highlight(code, 'red')
+            async for ttype, value in hl.get_tokens(code, 'html+handlebars'):
+                ...
+
+    `executor` is 'thread', 'process' or a concurrent.futures executor
+    (which is then not shut down by close()). Lexers are given by alias and
+    come from warm instances built once per worker; a lexer instance may be
+    passed instead (it is pickled for process pools). Process pools keep
+    the event loop responsive under load, threads share the GIL with it.
+
+    At most `limit` jobs run in the executor at a time (default: number of
+    workers); at most `max_pending` requests are in flight, beyond which
+    Overloaded is raised (default: no bound). With `coalesce`, identical
+    concurrent highlight requests share one job.
+
+    Cancelling a request cancels its job if it has not started yet; with a
+    thread executor a running highlight job also stops early, and a token
+    iterator stops lexing when it is no longer consumed.
+    """
+
+    def __init__(self, executor='thread', workers=None, limit=None, max_pending=None,
+                 coalesce=True, style=GithubCustom1Style):
+        if executor == 'thread':
+            self.executor = concurrent.futures.ThreadPoolExecutor(workers, initializer=_init_worker)
+            self.own_executor = True
+        elif executor == 'process':
+            self.executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker)
+            self.own_executor = True
+        else:
+            self.executor = executor
+            self.own_executor = False
+        self.threads = isinstance(self.executor, concurrent.futures.ThreadPoolExecutor)
+        self.limit = limit or workers or getattr(self.executor, '_max_workers', None) or 1
+        self.max_pending = max_pending
+        self.coalesce = coalesce
+        self.style = style
+        self.pending = 0
+        self.coalesced = 0
+        self.semaphore = None
+        self.inflight = {}
+
+    async def highlight(self, text, lexer, formatter='html', style=None, **options):
+        """
+        Returns `pygments.highlight(text, lexer, formatter)`, where the
+        formatter is the shared instance of styles.get_formatter(formatter,
+        style, **options).
+        """
+        spec = (formatter, style or self.style, _freeze(options))
+        key = None
+        if self.coalesce and isinstance(lexer, str):
+            key = (lexer.lower(), spec, text)
+        return await self._call(key, _highlight, lexer, text, spec)
+
+    async def get_tokens(self, text, lexer, batch=1000):
+        """
+        Asynchronously yields the (token type, value) pairs of
+        `lexer.get_tokens(text)`, lexed `batch` tokens at a time as they
+        are consumed (with a thread executor), or all at once in a worker
+        process.
+        """
+        self._admit()
+        try:
+            if self.threads:
+                tokens = await self._run(_start, lexer, text)
+                while True:
+                    chunk = await self._run(_batch, tokens, batch)
+                    for tok in chunk:
+                        yield tok
+                    if len(chunk) < batch:
+                        return
+            else:
+                tokens = await self._run(_lex, lexer, text)
+                types = {}
+                for i in range(0, len(tokens), batch):
+                    chunk = []
+                    for name, value in tokens[i:i+batch]:
+                        token = types.get(name)
+                        if token is None:
+                            token = types[name] = string_to_tokentype(name)
+                        chunk.append((token, value))
+                    for tok in chunk:
+                        yield tok
+                    await asyncio.sleep(0)
+        finally:
+            self.pending -= 1
+
+    def _admit(self):
+        if self.max_pending is not None and self.pending >= self.max_pending:
+            raise Overloaded('%d highlight requests pending' % self.pending)
+        self.pending += 1
+
+    async def _call(self, key, fn, *args):
+        entry = self.inflight.get(key) if key is not None else None
+        if entry is not None:
+            self.coalesced += 1
+        else:
+            self._admit()
+            entry = [asyncio.ensure_future(self._run(fn, *args)), 0]
+            entry[0].add_done_callback(lambda _: self._done(key, entry))
+            if key is not None:
+                self.inflight[key] = entry
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                # the last caller waiting for it gave up
+                entry[0].cancel()
+
+    def _done(self, key, entry):
+        self.pending -= 1
+        if key is not None and self.inflight.get(key) is entry:
+            del self.inflight[key]
+
+    async def _run(self, fn, *args):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.limit)
+        async with self.semaphore:
+            cancelled = threading.Event() if self.threads else None
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *(args + (cancelled,)))
+            try:
+                return await future
+            except asyncio.CancelledError:
+                if cancelled is not None:
+                    cancelled.set()
+                raise
+
+    def stats(self):
+        return {'pending': self.pending, 'coalesced': self.coalesced, 'inflight': len(self.inflight)}
+
+    def close(self):
+        if self.own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
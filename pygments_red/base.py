@@ -0,0 +1,778 @@
+# -*- coding: utf-8 -*-
+"""
+    Red lexer base
+    ~~~~~~~~~~~~~~
+
+    * lookahead/lookbehind post-processing of RegexLexer tokens --- class RedLexerBase
+"""
+from pygments.lexer import RegexLexer, RegexLexerMeta, DelegatingLexer, do_insertions
+from pygments.token import Token, String, Comment, Error, string_to_tokentype
+
+import re
+import copy
+import json
+import time
+import codecs
+import operator
+import collections
+import multiprocessing
+
+
+def _idx(t):   return (t[0] if t is not None else None)
+def _token(t): return (t[1] if t is not None else None)
+def _value(t): return (t[2] if t is not None else None)
+
+def _token_at(tokens, pos):
+    # the index of the last token that starts at or before `pos`
+    lo, hi = 0, len(tokens)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if tokens[mid][0] <= pos:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+# what RedLexerBase._relex returns to have update_tokens try again
+_RESTART = 'restart'
+_RESTART_EARLIER = 'restart earlier'
+_WIDEN = 'widen'
+
+# interpolations (e.g. "#{ ... }" in a string) hold code, so that tokens
+# of code can be inside a string
+_OPEN_INTERPOLATION = [(String.Interpol, '#{'), (String.Interpol, '{')]
+_CLOSE_INTERPOLATION = (String.Interpol, '}')
+
+def _nesting(tokens):
+    # how many interpolations the tokens leave open
+    pairs = list(map(operator.itemgetter(1, 2), tokens))
+    return sum(map(pairs.count, _OPEN_INTERPOLATION)) - pairs.count(_CLOSE_INTERPOLATION)
+
+def _in_construct(ttype):
+    # tokens of strings, heredocs, multi-line comments and errors, which
+    # may span lines
+    return ttype in String or ttype in Error or (ttype in Comment and ttype not in Comment.Single)
+
+"""
+--------------------------------------------------------------------------------
+  Content heuristics for lexer guessing. The analyse_text functions of the
+  pygments_red lexers only look at the first ANALYSE_SIZE characters, so
+  guessing the lexer of a text takes the same time whatever its size.
+--------------------------------------------------------------------------------
+"""
+ANALYSE_SIZE = 4096
+
+def signatures(*rules):
+    """
+    Returns an analyse_text function for (regex, score) rules: a text
+    scores the highest score of the rules whose regex (compiled once, in
+    multiline mode) matches its first ANALYSE_SIZE characters.
+    """
+    compiled = sorted(((re.compile(p, re.M), score) for p, score in rules),
+                      key=operator.itemgetter(1), reverse=True)
+    def analyse_text(text):
+        for regex, score in compiled:
+            if regex.search(text, 0, ANALYSE_SIZE):
+                return score
+        return 0.0
+    return analyse_text
+
+"""
+--------------------------------------------------------------------------------
+  Compiles the token table and the rewrite rules of a lexer class when it
+  is first instantiated, like RegexLexerMeta does. A class that does not
+  define its own `tokens` reuses the compiled table of the class it
+  inherits them from, so e.g. Ruby193/ARby/Red/Slang compile the Ruby
+  state machine only once.
+--------------------------------------------------------------------------------
+"""
+class RedLexerMeta(RegexLexerMeta):
+
+    def compiled_tokens(cls):
+        if '_tokens' not in cls.__dict__:
+            owner = [c for c in cls.__mro__ if 'tokens' in c.__dict__][0]
+            if owner is not cls and isinstance(owner, RedLexerMeta):
+                cls._tokens = owner.compiled_tokens()
+            else:
+                cls._all_tokens = {}
+                cls._tmpname = 0
+                tokendefs = cls.get_tokendefs() if hasattr(cls, 'get_tokendefs') else cls.tokens
+                cls._tokens = cls.process_tokendef('', tokendefs)
+        return cls._tokens
+
+    def __call__(cls, *args, **kwds):
+        cls.compiled_tokens()
+        if '_rewrites' not in cls.__dict__:
+            cls._rewrites = cls.compile_rewrite_rules()
+        if '_chunk_sync' not in cls.__dict__:
+            cls._chunk_sync = cls.compile_chunk_sync()
+        return RegexLexerMeta.__call__(cls, *args, **kwds)
+
+"""
+--------------------------------------------------------------------------------
+  Common lexer class that implements lookahed and lookbehind buffers.
+
+  The buffers belong to a single call of get_tokens_unprocessed: each call
+  runs on a shallow copy of the lexer with fresh buffers, so one lexer
+  instance can safely be shared between threads (or between interleaved
+  token generators) without tokens leaking from one document to another.
+--------------------------------------------------------------------------------
+"""
+class RedLexerBase(RegexLexer, metaclass=RedLexerMeta):
+
+    lookahead = 10
+    lookbehind = 1
+
+    def reset_state(self):
+        self.queue = collections.deque()
+        self.nows_queue = collections.deque()
+        self.processed = collections.deque([], self.lookbehind)
+
+    def peek_ahead(self, n):
+        if len(self.nows_queue) >= n:
+            return self.nows_queue[n-1]
+        else:
+            return (None, None, None)
+
+    def next(self):
+        return self.peek_ahead(1)
+
+    def prev(self):
+        if len(self.processed) > 0:
+            return self.processed[-1]
+        else:
+            return (None, None, None)
+
+    """
+    Token rewriting is driven by get_rewrite_rules, which returns an ordered
+    list of (token type, values, action) rules; a token type or list of
+    values of None matches anything. An action is either the new token type,
+    or a function (lexer, token) -> token that may return None to let the
+    following rules try. The first rule that applies wins.
+
+    The rules are compiled once per class into a dispatch index (see
+    compile_rewrite_rules and RedLexerMeta), so process_one rewrites a token with a couple of
+    dict lookups instead of walking every rule.
+    """
+
+    @classmethod
+    def get_rewrite_rules(cls):
+        return []
+
+    @classmethod
+    def compile_rewrite_rules(cls):
+        rules = cls.get_rewrite_rules()
+        types = set(r[0] for r in rules if r[0] is not None)
+        values = set(v for r in rules if r[1] is not None for v in r[1])
+
+        def actions_for(ttype, value):
+            ans = []
+            for rule_type, rule_values, action in rules:
+                if rule_type is not None and rule_type is not ttype: continue
+                if rule_values is not None and value not in rule_values: continue
+                ans.append(action)
+                if not callable(action): break
+            return tuple(ans)
+
+        by_value = {}
+        for v in values:
+            by_value[v] = dict((t, actions_for(t, v)) for t in types)
+            by_value[v][None] = actions_for(None, v)
+        by_type = dict((t, actions_for(t, None)) for t in types)
+        by_type[None] = actions_for(None, None)
+        return by_value, by_type
+
+    def process_one(self, curr):
+        curr_idx, curr_token, curr_value = curr
+        by_value, by_type = self._rewrites
+        index = by_value.get(curr_value, by_type)
+        actions = index.get(curr_token)
+        if actions is None:
+            actions = index[None]
+        for action in actions:
+            if not callable(action):
+                return (curr_idx, action, curr_value)
+            ans = action(self, curr)
+            if ans is not None:
+                return ans
+        return curr
+
+    """
+    Text is split into blocks at line breaks followed by a non-indented line
+    when streaming; override to resynchronize elsewhere. Lexing only
+    restarts at a block boundary that is not inside a string, heredoc,
+    multi-line comment or error (see is_sync_point), and not after the
+    opening of a construct that a single rule of the token table lexes
+    across lines (a stream_hold pair of opening and closing regexes) whose
+    end has not been read yet.
+    """
+    stream_sync = re.compile(r'\n(?=\S)')
+    stream_hold = ()
+
+    def __init__(self, **options):
+        RegexLexer.__init__(self, **options)
+        self.stats = options.get('stats')
+
+    def new_worker(self):
+        """
+        Returns the copy of this lexer that lexes one text (see reset_state);
+        with the `stats` option the copy is instrumented.
+        """
+        worker = copy.copy(self)
+        worker.reset_state()
+        if self.stats is not None:
+            worker.process_tokens = worker.profiled_process_tokens
+            worker.process_one = worker.profiled_process_one
+        return worker
+
+    def get_regex_tokens(self, text):
+        """
+        The tokens of the regex state machine alone, before process_tokens.
+        """
+        return RegexLexer.get_tokens_unprocessed(self, text)
+
+    def get_tokens_unprocessed(self, text):
+        worker = self.new_worker()
+        return worker.process_tokens(worker.get_regex_tokens(text))
+
+    def get_tokens_unprocessed_batch(self, texts):
+        """
+        Lexes several independent texts (e.g. the code fragments of a
+        template) with a single worker, and returns a list with the tokens
+        of each one; the tokens of a text are the same as those returned by
+        get_tokens_unprocessed for it alone. Texts that occur more than once
+        are only lexed once (the returned lists are then shared).
+        """
+        worker = self.new_worker()
+        done = {}
+        ans = []
+        for text in texts:
+            tokens = done.get(text)
+            if tokens is None:
+                worker.reset_state()
+                tokens = list(worker.process_tokens(worker.get_regex_tokens(text)))
+                done[text] = tokens
+            ans.append(tokens)
+        return ans
+
+    def get_tokens_unprocessed_stream(self, source, chunk_size=65536):
+        """
+        Like get_tokens_unprocessed, but reads the text incrementally from a
+        file-like object or an iterable of text (or bytes) chunks, and gives
+        the same tokens.
+
+        About chunk_size characters are lexed at a time, up to the last
+        place where lexing can safely restart (see stream_sync); a text
+        with no such place in it for longer (e.g. a huge heredoc) is held
+        until one comes, so memory use is chunk_size plus the longest such
+        stretch.
+        """
+        worker = self.new_worker()
+        return worker.process_tokens(worker._stream_raw_tokens(source, chunk_size))
+
+    def _read_chunks(self, source, chunk_size):
+        chunks = source
+        if hasattr(source, 'read'):
+            chunks = iter(lambda: source.read(chunk_size), source.read(0))
+        decoder = None
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    encoding = self.encoding if self.encoding not in ('guess', 'chardet') else 'utf-8'
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                chunk = decoder.decode(chunk)
+            yield chunk
+        if decoder is not None:
+            yield decoder.decode(b'', True)
+
+    def _stream_raw_tokens(self, source, chunk_size):
+        offset = 0
+        pending = ''
+        wait = chunk_size
+        for chunk in self._read_chunks(source, chunk_size):
+            pending += chunk
+            if len(pending) < wait: continue
+            tokens = list(self.get_regex_tokens(pending))
+            k = self._stream_cut(pending, tokens)
+            if k is None:
+                # nowhere to cut yet: try again with twice the text, so
+                # that a long stretch is not lexed over and over
+                wait = 2 * len(pending)
+                continue
+            cut = _idx(tokens[k])
+            for index, token, value in tokens[:k]:
+                yield (offset + index, token, value)
+            offset += cut
+            pending = pending[cut:]
+            wait = chunk_size
+        if pending:
+            for index, token, value in self.get_regex_tokens(pending):
+                yield (offset + index, token, value)
+
+    def _stream_cut(self, text, tokens, tries=3):
+        # the index of the last token of `tokens` (those of `text`) where
+        # lexing can restart, outside of any interpolation and followed by
+        # more than a lookahead window of tokens that lexing from there
+        # gives too; None if there is none
+        limit = self.hold_limit(text, 0, len(text))
+        depth = _nesting(tokens)
+        seen = 0
+        for k in range(len(tokens) - 1, 0, -1):
+            depth -= _nesting(tokens[k:k+1])
+            if _token(tokens[k]) is not Token.Text:
+                seen += 1
+            if seen <= self.lookahead or _idx(tokens[k]) > limit or depth: continue
+            if not self.is_sync_point(tokens[k-1], tokens[k]): continue
+            cut = _idx(tokens[k])
+            if list(self.get_regex_tokens(text[cut:])) == [(index - cut, token, value) for index, token, value in tokens[k:]]:
+                return k
+            tries -= 1
+            if tries == 0: break
+        return None
+
+    def hold_limit(self, text, start, end):
+        """
+        The offset in text[start:end] of the first opening of a stream_hold
+        construct that is not closed before `end` (or `end`): lexing can
+        not restart after it before more text is read.
+        """
+        ans = end
+        for opening, closing in self.stream_hold:
+            pos = start
+            while True:
+                m = opening.search(text, pos, ans)
+                if m is None: break
+                c = closing.search(text, m.end(), end)
+                if c is None:
+                    ans = m.start()
+                    break
+                pos = c.end()
+        return ans
+
+    def is_sync_point(self, prev, curr):
+        """
+        Whether lexing can restart at token `curr`, which follows token
+        `prev`: they meet at a block boundary (see stream_sync), and neither
+        is part of a string, heredoc, multi-line comment or error.
+        """
+        m = self.stream_sync.match(_value(prev)[-1:] + _value(curr)[:1])
+        return bool(m) and m.end() == 1 and not (_in_construct(_token(prev)) or _in_construct(_token(curr)))
+
+    def is_block_boundary(self, text, pos):
+        m = pos > 0 and self.stream_sync.match(text, pos - 1)
+        return bool(m) and m.end() == pos
+
+    def update_tokens(self, tokens, offset, deleted, inserted):
+        """
+        Re-lexes a document after an edit that replaces `deleted` characters
+        at `offset` with the `inserted` text. `tokens` is the list previously
+        returned by get_tokens_unprocessed for the whole document.
+
+        Lexing restarts at the closest place where it can (see
+        is_sync_point), outside of any interpolation, that is at least two
+        lookahead windows before the edit; if the tokens of the first window
+        are not the old ones, it restarts further back. It stops as soon as,
+        past the edit and at such a place (in both the old and the new
+        tokens), more than a lookahead window of new tokens has lined up
+        with the old ones; the remaining old tokens are reused with their
+        offsets shifted. Only the text from the restart to a little
+        past the edit is rebuilt (more if the tokens do not line up within
+        it), so the time taken depends on how far the edit changes the
+        tokens, not on the size of the document. Returns the new token list.
+        """
+        if not tokens:
+            return list(self.get_tokens_unprocessed(inserted))
+        e = _token_at(tokens, offset)
+        f = _token_at(tokens, offset + deleted)
+
+        # the tokens before `guard` must come out as they were; lexing
+        # restarts another lookahead window before it
+        guard = self._back_off(tokens, e)
+        j = self._back_off(tokens, guard)
+        window = 4 * self.lookahead
+        depth = _nesting(tokens[:j])
+        while True:
+            # restart outside of any interpolation
+            while j > 0 and (depth or not self.is_sync_point(tokens[j-1], tokens[j])):
+                j -= 1
+                depth -= _nesting(tokens[j:j+1])
+            ans = self._relex(tokens, j, guard, e, f, offset, deleted, inserted, window)
+            if ans is _RESTART:
+                j, depth = 0, 0
+            elif ans is _RESTART_EARLIER:
+                back = max(guard - 2 * (guard - j) - 1, 0)
+                depth -= _nesting(tokens[back:j])
+                j = back
+            elif ans is _WIDEN:
+                window *= 4
+            else:
+                return ans
+
+    def _back_off(self, tokens, j):
+        # the index of the token a lookahead window before tokens[j]
+        seen = 0
+        while j > 0 and seen <= self.lookahead:
+            j -= 1
+            if _token(tokens[j]) is not Token.Text:
+                seen += 1
+        return j
+
+    def _relex(self, tokens, j, guard, e, f, offset, deleted, inserted, window):
+        # lexes from tokens[j] to `window` tokens past the edited text (a
+        # place where lexing can restart), see update_tokens
+        restart = _idx(tokens[j])
+        delta = len(inserted) - deleted
+        edit_end = offset + len(inserted)
+        m = min(f + 1 + window, len(tokens))
+        while m < len(tokens) and not self.is_sync_point(tokens[m-1], tokens[m]):
+            m += 1
+        tail = _value(tokens[f])[offset + deleted - _idx(tokens[f]):]
+        text = ''.join([''.join(map(_value, tokens[j:e])), _value(tokens[e])[:offset - _idx(tokens[e])],
+                        inserted, tail, ''.join(map(_value, tokens[f+1:m]))])
+        if j > 0 and self.stream_hold:
+            # the edited lines may close a construct opened anywhere before
+            start = max(text.rfind('\n', 0, offset - restart), 0)
+            stop = text.find('\n', edit_end - restart)
+            lines = text[start:stop + 1 if stop >= 0 else len(text)]
+            if any(closing.search(lines) for _, closing in self.stream_hold):
+                return _RESTART
+        complete = m == len(tokens)
+        if not complete and self.hold_limit(text, 0, len(text)) < len(text):
+            return _WIDEN
+
+        worker = self.new_worker()
+        i = j
+        behind = []
+        while i > 0 and len(behind) < self.lookbehind:
+            i -= 1
+            if _token(tokens[i]) is not Token.Text:
+                behind.append(tokens[i])
+        worker.processed.extend(reversed(behind))
+        exhausted = []
+        def raw():
+            for index, token, value in worker.get_regex_tokens(text):
+                yield (restart + index, token, value)
+            exhausted.append(True)
+
+        ans = tokens[:j]
+        k = f
+        matched = 0
+        unchanged = _idx(tokens[guard]) if j > 0 else 0
+        # the interpolations left open since the restart, in the new and
+        # in the old tokens (up to tokens[k])
+        depth = 0
+        old_depth = _nesting(tokens[j:k])
+        for t in worker.process_tokens(raw()):
+            if _idx(t) < unchanged and t != tokens[len(ans)]:
+                return _RESTART_EARLIER
+            ans.append(t)
+            depth += _nesting(ans[-1:])
+            if _idx(t) < edit_end: continue
+            old_idx = _idx(t) - delta
+            while k < len(tokens) and _idx(tokens[k]) < old_idx:
+                old_depth += _nesting(tokens[k:k+1])
+                k += 1
+            if k < len(tokens) and tokens[k] == (old_idx, _token(t), _value(t)):
+                matched += 1
+                if (matched > self.lookahead and not exhausted and not depth and not old_depth and
+                        self.is_sync_point(ans[-2], t)):
+                    if delta == 0:
+                        ans.extend(tokens[k+1:])
+                    else:
+                        ans.extend([(index + delta, token, value) for index, token, value in tokens[k+1:]])
+                    return ans
+            else:
+                matched = 0
+        return ans if complete else _WIDEN
+
+    """
+    Parallel lexing: the text is cut into chunks of about chunk_size
+    characters, each starting where _chunk_sync matches (see
+    compile_chunk_sync), and the chunks are lexed in a process pool. Every
+    chunk is lexed from its start with fresh state and a little past its
+    end (chunk_overlap characters). At each seam, the tokens of the
+    previous chunk are kept until more than a lookahead window of them,
+    ending at a block boundary, is the same as in the next chunk; from there
+    on the tokens of the next chunk are used. A seam that does not line up
+    within the overlap (e.g. a chunk cut inside a long heredoc) makes the
+    whole text be lexed serially, so the result is always the one of
+    get_tokens_unprocessed.
+    """
+
+    chunk_overlap = 8192
+
+    @classmethod
+    def compile_chunk_sync(cls):
+        return cls.stream_sync
+
+    def chunk_cuts(self, text, chunk_size):
+        cuts = [0]
+        while True:
+            m = self._chunk_sync.search(text, cuts[-1] + chunk_size)
+            if m is None: break
+            cuts.append(m.end())
+        return cuts
+
+    def get_tokens_unprocessed_parallel(self, text, jobs=None, chunk_size=None):
+        """
+        Returns the list of tokens get_tokens_unprocessed returns for
+        `text`, lexing it in chunks on `jobs` processes (default: number of
+        CPUs). The default chunk size gives each process two chunks.
+        """
+        jobs = jobs or multiprocessing.cpu_count()
+        if chunk_size is None:
+            chunk_size = max(len(text) // (2 * jobs), 4 * self.chunk_overlap)
+        overlap = min(self.chunk_overlap, chunk_size // 2)
+        cuts = self.chunk_cuts(text, chunk_size)
+        if jobs < 2 or len(cuts) < 2:
+            return list(RedLexerBase.get_tokens_unprocessed(self, text))
+
+        bounds = cuts[1:] + [len(text)]
+        chunks = [(start, min(stop + overlap, len(text))) for start, stop in zip(cuts, bounds)]
+        options = dict(self.options)
+        options.pop('stats', None)
+        # an instance rather than the class: lexers of registered dialects
+        # pickle with their dialect, so spawned workers can rebuild them
+        pool = multiprocessing.Pool(min(jobs, len(chunks)), _init_chunk_worker,
+                                    (self.__class__(**options), text))
+        try:
+            types = {}
+            ans = []
+            for (start, limit), tokens in zip(chunks, pool.imap(_lex_chunk, chunks)):
+                for name in set(map(operator.itemgetter(1), tokens)) - set(types):
+                    types[name] = string_to_tokentype(name)
+                tokens = [(index, types[name], value) for index, name, value in tokens]
+                if start == 0:
+                    ans = tokens
+                elif not self._join_chunk(text, ans, start, tokens):
+                    return list(RedLexerBase.get_tokens_unprocessed(self, text))
+            return ans
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _join_chunk(self, text, ans, start, tokens):
+        # ans: the tokens so far, running past `start`; tokens: those of the
+        # chunk lexed from `start` on. Returns False if they never line up.
+        j = len(ans)
+        while j > 0 and _idx(ans[j-1]) >= start:
+            j -= 1
+        k = 0
+        matched = 0
+        for i in range(j, len(ans)):
+            t = ans[i]
+            while k < len(tokens) and _idx(tokens[k]) < _idx(t):
+                k += 1
+            if k < len(tokens) and tokens[k] == t:
+                matched += 1
+                if matched > self.lookahead and self.is_block_boundary(text, _idx(t)):
+                    del ans[i+1:]
+                    ans.extend(tokens[k+1:])
+                    return True
+            else:
+                matched = 0
+        return False
+
+    def process_tokens(self, tokens):
+        # the (index, token, value) tuples coming from the regex stage are
+        # queued as they are (both queues share them), so the lookahead
+        # buffers cost two pointers per token and no extra allocation
+        by_value, by_type = self._rewrites
+        if not by_value and by_type == {None: ()}:
+            # no rewrite rules, the tokens pass through untouched
+            yield from tokens
+            return
+
+        queue = self.queue
+        nows_queue = self.nows_queue
+        processed = self.processed
+        process_one = self.process_one
+        need = 1 + self.lookahead
+        text = Token.Text
+
+        for tok in tokens:
+            queue.append(tok)
+            if tok[1] is not text:
+                nows_queue.append(tok)
+            if len(nows_queue) < need: continue
+            curr = queue.popleft()
+            if curr[1] is not text:
+                nows_queue.popleft()
+            ans = process_one(curr)
+            if ans is not None:
+                if ans[1] is not text:
+                    processed.append(ans)
+                yield ans
+
+        while (len(queue) > 0):
+            curr = queue.popleft()
+            if curr[1] is not text:
+                nows_queue.popleft()
+            ans = process_one(curr)
+            if ans is not None:
+                if ans[1] is not text:
+                    processed.append(ans)
+                yield ans
+
+    def profiled_process_tokens(self, tokens):
+        stats = self.stats
+        clock = time.perf_counter
+        stats.documents += 1
+
+        def timed(tokens):
+            it = iter(tokens)
+            while True:
+                t = clock()
+                try:
+                    tok = next(it)
+                except StopIteration:
+                    stats.regex_time += clock() - t
+                    return
+                stats.regex_time += clock() - t
+                yield tok
+
+        it = RedLexerBase.process_tokens(self, timed(tokens))
+        while True:
+            t = clock()
+            try:
+                tok = next(it)
+            except StopIteration:
+                stats.total_time += clock() - t
+                return
+            stats.total_time += clock() - t
+            stats.tokens += 1
+            yield tok
+
+    def profiled_process_one(self, curr):
+        stats = self.stats
+        t = time.perf_counter()
+        depth = len(self.nows_queue)
+        stats.queue_depth_total += depth
+        if depth > stats.queue_depth_max:
+            stats.queue_depth_max = depth
+
+        curr_idx, curr_token, curr_value = curr
+        by_value, by_type = self._rewrites
+        index = by_value.get(curr_value, by_type)
+        actions = index.get(curr_token)
+        if actions is None:
+            actions = index[None]
+        ans = curr
+        for action in actions:
+            if not callable(action):
+                ans = (curr_idx, action, curr_value)
+                stats.rule_hits['to ' + str(action)] += 1
+                break
+            res = action(self, curr)
+            if res is not None:
+                ans = res
+                stats.rule_hits[action.__name__] += 1
+                break
+        stats.processed += 1
+        stats.rewrite_time += time.perf_counter() - t
+        return ans
+
+# ----------------------------------------------------
+#  worker processes of get_tokens_unprocessed_parallel keep one lexer and
+#  the whole text around, and return the tokens of one chunk with their
+#  token types by name (interned, so they pickle once per chunk)
+
+_chunk_worker = {}
+
+def _init_chunk_worker(lexer, text):
+    _chunk_worker['lexer'] = lexer
+    _chunk_worker['text'] = text
+
+def _lex_chunk(chunk):
+    start, limit = chunk
+    worker = _chunk_worker['lexer'].new_worker()
+    names = {}
+    ans = []
+    for index, token, value in worker.process_tokens(
+            worker.get_regex_tokens(_chunk_worker['text'][start:])):
+        index += start
+        if index >= limit: break
+        name = names.get(token)
+        if name is None:
+            name = names[token] = str(token)
+        ans.append((index, name, value))
+    return ans
+
+"""
+--------------------------------------------------------------------------------
+  Instrumentation data of RedLexerBase lexers created with the `stats`
+  option, e.g.
+
+      stats = LexerStats()
+      list(RedLexer(stats=stats).get_tokens(text))
+      print(stats.to_json())
+
+  Times are in seconds: `regex_time` is spent in the RegexLexer state
+  machine, `rewrite_time` in process_one, and `total_time` in the whole
+  pipeline (the rest is buffer bookkeeping). `rule_hits` counts the
+  rewrite rules that fired, by rule (function name, or "to <token type>"
+  for plain token type rules). The queue depth is the number of non-text
+  tokens of lookahead available when a token is processed. Without the
+  option, lexers take none of these measurements.
+--------------------------------------------------------------------------------
+"""
+class LexerStats(object):
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.documents = 0
+        self.tokens = 0
+        self.processed = 0
+        self.regex_time = 0.0
+        self.rewrite_time = 0.0
+        self.total_time = 0.0
+        self.queue_depth_total = 0
+        self.queue_depth_max = 0
+        self.rule_hits = collections.Counter()
+
+    def as_dict(self):
+        return {
+            'documents': self.documents,
+            'tokens': self.tokens,
+            'regex_time': self.regex_time,
+            'rewrite_time': self.rewrite_time,
+            'postprocess_time': self.total_time - self.regex_time,
+            'total_time': self.total_time,
+            'queue_depth_mean': self.queue_depth_total / float(self.processed) if self.processed else 0.0,
+            'queue_depth_max': self.queue_depth_max,
+            'rule_hits': dict(self.rule_hits),
+        }
+
+    def to_json(self, **kwds):
+        kwds.setdefault('indent', 2)
+        kwds.setdefault('sort_keys', True)
+        return json.dumps(self.as_dict(), **kwds)
+
+"""
+--------------------------------------------------------------------------------
+  DelegatingLexer that collects the text for the root lexer in a list and
+  joins it once, instead of growing a string one token at a time.
+--------------------------------------------------------------------------------
+"""
+class RedDelegatingLexer(DelegatingLexer):
+
+    def get_tokens_unprocessed(self, text):
+        buffered = []
+        size = 0
+        insertions = []
+        lng_buffer = []
+        for i, t, v in self.language_lexer.get_tokens_unprocessed(text):
+            if t is self.needle:
+                if lng_buffer:
+                    insertions.append((size, lng_buffer))
+                    lng_buffer = []
+                buffered.append(v)
+                size += len(v)
+            else:
+                lng_buffer.append((i, t, v))
+        if lng_buffer:
+            insertions.append((size, lng_buffer))
+        return do_insertions(insertions,
+                             self.root_lexer.get_tokens_unprocessed(''.join(buffered)))
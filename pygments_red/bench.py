@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmarks
+    ~~~~~~~~~~
+
+    * deterministic synthetic corpora for every lexer in the package
+    * lexing throughput, peak memory and per-token latency per lexer
+    * throughput of the rewrite stage alone, against the linear walk over
+      the rewrite rules of pygments_red.verify
+    * formatting time per style
+    * size of exported token streams and HTML rendering from them (pygments_red.export)
+    * import time of every entry point module
+    * scaling of parallel Red/ARby lexing with the number of processes
+    * accuracy and speed of lexer guessing (pygments_red.detect)
+    * event loop latency while highlighting through pygments_red.aio
+    * results as JSON, e.g.
+
+        python -m pygments_red.bench --size 200000 -o results.json
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import platform
+import tracemalloc
+
+import pygments
+import pygments_red
+from pygments_red import detect, aio
+from pygments_red.export import TokenStream
+from pygments_red.htmlformat import FastHtmlFormatter
+from pygments.formatters import HtmlFormatter
+
+
+"""
+--------------------------------------------------------------------------------
+  Corpus generators. Each one takes a random.Random and returns one
+  snippet; corpus() concatenates snippets until the requested size.
+--------------------------------------------------------------------------------
+"""
+
+def _ident(rnd, capital=False):
+    s = rnd.choice(['user', 'post', 'name', 'title', 'owner', 'room', 'msg', 'body', 'status', 'ts'])
+    s += str(rnd.randint(0, 99))
+    return s.capitalize() if capital else s
+
+def _ruby(rnd):
+    c, m, a, b = _ident(rnd, True), _ident(rnd), _ident(rnd), _ident(rnd)
+    return ('class %s < Base\n'
+            '  # %s helper\n'
+            '  def %s(%s, %s = nil)\n'
+            '    h = {name: %s, p: %d, "k" => \'%s\'}\n'
+            '    return X::Y::%s.new(h) if %s =~ /^%s[0-9]+$/\n'
+            '    [%s, %s, :sym].map { |x| x.to_s * %d }\n'
+            '  end\n'
+            'end\n\n') % (c, m, m, a, b, a, rnd.randint(0, 9999), b, c, a, m, a, b, rnd.randint(1, 9))
+
+def _arby(rnd):
+    s, t, f = _ident(rnd, True), _ident(rnd, True), _ident(rnd)
+    return ('alloy_model :%s do\n'
+            '  sig %s [%s: set %s, %s: lone %s]\n'
+            '  abstract sig %s extends %s\n'
+            '  pred p_%s[a, b, :c] { all x: %s | some y: %s | x in? y and not_in?(x, y) }\n'
+            '  fun f_%s[a: %s][%s] { a.%s }\n'
+            '  fact { no %s & %s; one_one }\n'
+            '  run :p_%s, %d, exactly 2 %s\n'
+            'end\n\n') % (s, s, f, t, f + 'x', t, t, s, f, s, t, f, s, t, f, s, t, f, rnd.randint(1, 9), s)
+
+def _red(rnd):
+    r, e, f = _ident(rnd, True), _ident(rnd, True), _ident(rnd)
+    return ('record %s do\n'
+            '  refs owner: User\n'
+            '  fields %s: String, body: Text\n'
+            '  owns items: (set Item)\n'
+            'end\n'
+            'event %s do\n'
+            '  from client: Client\n'
+            '  to serv: Server\n'
+            '  params %s: String, n: Integer\n'
+            '  requires {\n'
+            '    reject "no %s" unless %s\n'
+            '    render :template => "%s" when ok\n'
+            '  }\n'
+            '  ensures { client.%s = [a, b, :c] }\n'
+            'end\n\n') % (r, f, e, f, f, f, f, f)
+
+def _slang(rnd):
+    c, d, o = _ident(rnd, True), _ident(rnd, True), _ident(rnd, True)
+    return ('component %s do\n'
+            '  data %s\n'
+            '  trusted model M%s\n'
+            '  critical operation %s do\n'
+            '    guard { creates %s; dynamic effects sends triggers response }\n'
+            '  end\n'
+            'end\n\n') % (c, d, d, o, d)
+
+def _sunny(rnd):
+    r, e, f = _ident(rnd, True), _ident(rnd, True), _ident(rnd)
+    return ('record %s {\n'
+            '  %s: Text\n'
+            '  count: Int\n'
+            '}\n'
+            'event %s {\n'
+            '  from: client, to: server\n'
+            '  params: {%s: Text}\n'
+            '  requires: -> x.map(y).filter(z).some(all).fold()\n'
+            '  ensures: -> @%s = %d\n'
+            '}\n\n') % (r, f, e, f, f, rnd.randint(0, 999))
+
+def _erb(rnd):
+    f = _ident(rnd)
+    return ('<div class="%s">\n'
+            '  <%% %s = items.map { |i| i.name } %%>\n'
+            '  <p><%%= %s.first %%></p>\n'
+            '  <%%# comment %%>\n'
+            '</div>\n') % (f, f, f)
+
+def _handlebars(rnd):
+    f, g = _ident(rnd), _ident(rnd)
+    return ('<ul class="%s">\n'
+            '  {{! %s list }}\n'
+            '  {{#each %s}}<li class="{{cls}}">{{{raw name}}} {{helper .x 1.5 \'s\' opt="%s"}}</li>{{/each}}\n'
+            '  {{#if %s}}yes{{else}}no{{/if}}\n'
+            '</ul>\n') % (f, f, f, g, g)
+
+GENERATORS = {
+    'ruby193':         _ruby,
+    'arby':            _arby,
+    'red':             _red,
+    'slang':           _slang,
+    'sunny':           _sunny,
+    'errb':            _erb,
+    'ered':            _erb,
+    'redhtml':         _erb,
+    'handlebars':      _handlebars,
+    'html+handlebars': _handlebars,
+}
+
+LEXERS = {
+    'ruby193':         pygments_red.Ruby193Lexer,
+    'arby':            pygments_red.ARbyLexer,
+    'red':             pygments_red.RedLexer,
+    'slang':           pygments_red.SlangLexer,
+    'sunny':           pygments_red.SunnyLexer,
+    'errb':            pygments_red.ErrbLexer,
+    'ered':            pygments_red.EredLexer,
+    'redhtml':         pygments_red.RedHtmlLexer,
+    'handlebars':      pygments_red.HandlebarsLexer,
+    'html+handlebars': pygments_red.HandlebarsHtmlLexer,
+}
+
+STYLES = {
+    'redstyle':     pygments_red.RedStyle,
+    'github':       pygments_red.GithubStyle,
+    'githubcustom': pygments_red.GithubCustom1Style,
+}
+
+
+def corpus(alias, size, seed=0):
+    """
+    Returns a synthetic source of about `size` characters for the lexer
+    `alias`; the same arguments always give the same text.
+    """
+    rnd = random.Random('%s:%d' % (alias, seed))
+    gen = GENERATORS[alias]
+    parts = []
+    n = 0
+    while n < size:
+        s = gen(rnd)
+        parts.append(s)
+        n += len(s)
+    return ''.join(parts)
+
+"""
+--------------------------------------------------------------------------------
+  Measurements
+--------------------------------------------------------------------------------
+"""
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        ans = fn()
+        d = time.perf_counter() - t
+        if best is None or d < best:
+            best = d
+    return best, ans
+
+def _percentile(values, p):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+def bench_lexer(alias, text, repeat=3):
+    lexer = LEXERS[alias]()
+    list(lexer.get_tokens_unprocessed(text[:1000]))
+
+    elapsed, ntokens = _best(lambda: sum(1 for _ in lexer.get_tokens_unprocessed(text)), repeat)
+
+    tracemalloc.start()
+    for _ in lexer.get_tokens_unprocessed(text): pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    gaps = []
+    last = time.perf_counter()
+    for _ in lexer.get_tokens_unprocessed(text):
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+    return {
+        'bytes': len(text.encode('utf-8')),
+        'tokens': ntokens,
+        'seconds': elapsed,
+        'tokens_per_sec': ntokens / elapsed,
+        'bytes_per_sec': len(text.encode('utf-8')) / elapsed,
+        'peak_memory_bytes': peak,
+        'token_latency_us': {
+            'mean': 1e6 * sum(gaps) / max(len(gaps), 1),
+            'p50': 1e6 * _percentile(gaps, 0.5),
+            'p99': 1e6 * _percentile(gaps, 0.99),
+            'max': 1e6 * max(gaps or [0.0]),
+        },
+    }
+
+def bench_rewrite(alias, text, repeat=3):
+    """
+    Replays the regex stage tokens of `text` through process_tokens (the
+    dispatch index of the compiled rewrite rules) and through
+    verify.reference_rewrite (every rule tried in order for every token),
+    which must give the same tokens.
+    """
+    from pygments_red import verify
+    lexer = LEXERS[alias]()
+    raw = list(lexer.new_worker().get_regex_tokens(text))
+    indexed, tokens = _best(lambda: list(lexer.new_worker().process_tokens(iter(raw))), repeat)
+    linear, expected = _best(lambda: verify.reference_rewrite(lexer.new_worker(), raw), repeat)
+    return {
+        'tokens': len(raw),
+        'seconds': indexed,
+        'tokens_per_sec': len(raw) / indexed,
+        'linear_seconds': linear,
+        'linear_tokens_per_sec': len(raw) / linear,
+        'speedup': linear / indexed,
+        'identical': tokens == expected,
+    }
+
+# the lexers whose tokens go through the compiled rewrite rules
+REWRITE = ['ruby193', 'arby', 'red', 'slang']
+
+def bench_style(style, tokens, repeat=3):
+    formatter = HtmlFormatter(style=style)
+    fmt, _ = _best(lambda: formatter.format(iter(tokens), _NullWriter()), repeat)
+    defs, _ = _best(lambda: HtmlFormatter(style=style).get_style_defs('.highlight'), repeat)
+    return {'tokens': len(tokens), 'format_seconds': fmt, 'tokens_per_sec': len(tokens) / fmt,
+            'style_defs_seconds': defs}
+
+def bench_export(alias, text, style, repeat=3):
+    """
+    Exports the tokens of `text` once and times reading them back and
+    rendering them with FastHtmlFormatter, against lexing the text and
+    formatting the tokens with HtmlFormatter; the HTML must be the same.
+    """
+    lexer = LEXERS[alias]()
+    tokens = list(lexer.get_tokens(text))
+    stream = TokenStream.from_tokens(tokens)
+    data = stream.to_bytes()
+    js = stream.to_json()
+    expected = pygments.format(iter(tokens), HtmlFormatter(style=style))
+    fast = FastHtmlFormatter(style=style)
+    html, _ = _best(lambda: HtmlFormatter(style=style).format(iter(tokens), _NullWriter()), repeat)
+    fast_html, out = _best(lambda: pygments.format(stream, fast), repeat)
+    load, _ = _best(lambda: TokenStream.from_bytes(data), repeat)
+    load_json, _ = _best(lambda: TokenStream.from_json(js), repeat)
+    lexed, _ = _best(lambda: pygments.highlight(text, lexer, HtmlFormatter(style=style)), repeat)
+    loaded, _ = _best(lambda: pygments.format(TokenStream.from_bytes(data), FastHtmlFormatter(style=style)), repeat)
+    return {
+        'text_bytes': len(text.encode('utf-8')),
+        'tokens': len(tokens),
+        'runs': len(stream),
+        'export_bytes': len(data),
+        'export_bytes_without_text': len(stream.to_bytes(text=False)),
+        'export_json_bytes': len(js.encode('utf-8')),
+        'load_seconds': load,
+        'load_json_seconds': load_json,
+        'html_seconds': html,
+        'fast_html_seconds': fast_html,
+        'format_speedup': html / fast_html,
+        'lex_and_html_seconds': lexed,
+        'load_and_fast_html_seconds': loaded,
+        'speedup': lexed / loaded,
+        'identical': out == expected and TokenStream.from_bytes(data) == stream == TokenStream.from_json(js),
+    }
+
+def bench_scaling(alias, text, jobs, repeat=3):
+    """
+    Lexes `text` serially and then in parallel on 2..`jobs` processes
+    (including the process pool start-up), and checks that the tokens are
+    the same every time.
+    """
+    cls = LEXERS[alias]
+    serial, expected = _best(lambda: list(cls().get_tokens_unprocessed(text)), repeat)
+    ans = {'1': {'seconds': serial, 'speedup': 1.0, 'identical': True}}
+    for n in range(2, jobs + 1):
+        lexer = cls(jobs=n)
+        elapsed, tokens = _best(lambda: lexer.get_tokens_unprocessed(text), repeat)
+        ans[str(n)] = {'seconds': elapsed, 'speedup': serial / elapsed, 'identical': tokens == expected}
+    return ans
+
+SCALING = ['arby', 'red']
+
+DETECT = ['ruby193', 'arby', 'red', 'slang', 'sunny', 'errb', 'html+handlebars']
+
+def bench_detect(samples=100, seed=0, repeat=3):
+    """
+    Guesses the lexer of `samples` snippets (of 1 to 20 blocks) of each
+    corpus in DETECT, and of one big text, which should take no longer.
+    """
+    rnd = random.Random(seed)
+    cases = [(alias, corpus(alias, rnd.randint(1, 2000), seed * samples + i))
+             for alias in DETECT for i in range(samples)]
+    hits = dict((alias, 0) for alias in DETECT)
+    for alias, text in cases:
+        if detect.guess_lexer(text) is LEXERS[alias]:
+            hits[alias] += 1
+    elapsed, _ = _best(lambda: [detect.guess_lexer(text) for _, text in cases], repeat)
+    big = corpus('red', 1000000, seed)
+    big_elapsed, _ = _best(lambda: detect.guess_lexer(big), repeat)
+    return {
+        'samples': len(cases),
+        'accuracy': sum(hits.values()) / float(len(cases)),
+        'accuracy_per_lexer': dict((alias, n / float(samples)) for alias, n in hits.items()),
+        'guesses_per_sec': len(cases) / elapsed,
+        'guess_us': 1e6 * elapsed / len(cases),
+        'guess_1mb_us': 1e6 * big_elapsed,
+    }
+
+def bench_aio(alias, text, requests=8, executor='thread', workers=2):
+    """
+    Highlights `requests` different texts at once, either inline on the
+    event loop (executor=None) or through an AsyncHighlighter, while a
+    ticker measures how late the loop wakes it up every millisecond.
+    """
+    texts = ['%s\n# %d\n' % (text, i) for i in range(requests)]
+
+    async def inline(code):
+        await asyncio.sleep(0)
+        return pygments.highlight(code, LEXERS[alias](), HtmlFormatter())
+
+    async def main():
+        lags = []
+        done = []
+        async def ticker():
+            while not done:
+                t = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - t - 0.001)
+        tick = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0.01)
+        t = time.perf_counter()
+        if executor is None:
+            await asyncio.gather(*[inline(code) for code in texts])
+        else:
+            async with aio.AsyncHighlighter(executor, workers=workers) as hl:
+                await hl.highlight('', alias)
+                t = time.perf_counter()
+                await asyncio.gather(*[hl.highlight(code, alias) for code in texts])
+        elapsed = time.perf_counter() - t
+        done.append(True)
+        await tick
+        return elapsed, lags
+
+    elapsed, lags = asyncio.run(main())
+    return {
+        'requests': requests,
+        'seconds': elapsed,
+        'requests_per_sec': requests / elapsed,
+        'loop_lag_ms': {
+            'p50': 1e3 * _percentile(lags, 0.5),
+            'p99': 1e3 * _percentile(lags, 0.99),
+            'max': 1e3 * max(lags or [0.0]),
+        },
+    }
+
+IMPORTS = ['pygments_red', 'pygments_red.detect', 'pygments_red.aio', 'pygments_red.htmlformat', 'pygments_red.ruby', 'pygments_red.sunny', 'pygments_red.erb',
+           'pygments_red.handlebars', 'pygments_red.styles', 'pygments_red.redstyle']
+
+def bench_import(module, repeat=3):
+    """
+    Seconds it takes a fresh interpreter to import `module`.
+    """
+    code = ('import time; t = time.perf_counter(); import %s; '
+            'print(time.perf_counter() - t)' % module)
+    return min(float(subprocess.check_output([sys.executable, '-c', code]))
+               for _ in range(repeat))
+
+class _NullWriter(object):
+    def write(self, s): pass
+
+def run(size=100000, seed=0, repeat=3, lexers=None, styles=None, scaling=0, aio_requests=0):
+    lexers = lexers or sorted(LEXERS)
+    styles = styles or sorted(STYLES)
+    results = {
+        'meta': {
+            'pygments_red': getattr(pygments_red, '__version__', None),
+            'pygments': pygments.__version__,
+            'python': platform.python_version(),
+            'size': size, 'seed': seed, 'repeat': repeat,
+        },
+        'lexers': {},
+        'rewrite': {},
+        'styles': {},
+        'imports': {},
+        'detect': bench_detect(seed=seed, repeat=repeat),
+    }
+    if scaling:
+        results['scaling'] = {}
+    if aio_requests:
+        text = corpus('red', size // 4, seed)
+        results['aio'] = dict((name, bench_aio('red', text, aio_requests, executor))
+                              for name, executor in [('inline', None), ('thread', 'thread'),
+                                                     ('process', 'process')])
+    for alias in lexers:
+        results['lexers'][alias] = bench_lexer(alias, corpus(alias, size, seed), repeat)
+        if alias in REWRITE:
+            results['rewrite'][alias] = bench_rewrite(alias, corpus(alias, size, seed), repeat)
+    tokens = list(pygments_red.RedLexer().get_tokens(corpus('red', size, seed)))
+    for name in styles:
+        results['styles'][name] = bench_style(STYLES[name], tokens, repeat)
+    results['export'] = dict((alias, bench_export(alias, corpus(alias, size, seed), STYLES['githubcustom'], repeat))
+                             for alias in lexers)
+    for module in IMPORTS:
+        results['imports'][module] = bench_import(module, repeat)
+    for alias in SCALING if scaling else []:
+        results['scaling'][alias] = bench_scaling(alias, corpus(alias, size, seed), scaling, repeat)
+    return results
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='pygments_red.bench',
+                                     description='Benchmark the pygments_red lexers and styles.')
+    parser.add_argument('--size', type=int, default=100000, help='corpus size in characters per lexer')
+    parser.add_argument('--seed', type=int, default=0, help='corpus generator seed')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions (best is reported)')
+    parser.add_argument('--lexer', action='append', choices=sorted(LEXERS), help='only these lexers')
+    parser.add_argument('--style', action='append', choices=sorted(STYLES), help='only these styles')
+    parser.add_argument('--scaling', type=int, default=0, metavar='N',
+                        help='also time parallel ARby/Red lexing on 1..N processes')
+    parser.add_argument('--aio', type=int, default=0, metavar='N',
+                        help='also measure event loop latency with N concurrent async highlights')
+    parser.add_argument('--corpus', metavar='ALIAS', help='print the corpus for ALIAS and exit')
+    parser.add_argument('-o', '--output', help='write JSON results here instead of stdout')
+    opts = parser.parse_args(args)
+
+    if opts.corpus:
+        sys.stdout.write(corpus(opts.corpus, opts.size, opts.seed))
+        return 0
+    results = run(opts.size, opts.seed, opts.repeat, opts.lexer, opts.style, opts.scaling, opts.aio)
+    out = json.dumps(results, indent=2, sort_keys=True)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            f.write(out + '\n')
+    else:
+        sys.stdout.write(out + '\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
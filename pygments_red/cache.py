@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+    Highlight cache
+    ~~~~~~~~~~~~~~~
+
+    * content-addressed cache of token streams and rendered output
+    * in-memory LRU with optional sqlite store --- class HighlightCache
+"""
+from pygments.token import string_to_tokentype
+
+import pygments
+import pygments_red
+
+import json
+import base64
+import hashlib
+import sqlite3
+import threading
+import collections
+
+
+def _options_key(options):
+    return repr(sorted((k, repr(v)) for k, v in options.items()))
+
+def _class_name(cls):
+    return '%s.%s' % (cls.__module__, cls.__qualname__)
+
+def _style_name(formatter):
+    style = getattr(formatter, 'style', None)
+    return _class_name(style) if isinstance(style, type) else repr(style)
+
+# stored as JSON: token lists as [[type name, value], ...], text as a
+# string, and the bytes of formatters with an output encoding tagged
+# {"bytes": base64}
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return {'bytes': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, str):
+        return value
+    return [(str(t), v) for t, v in value]
+
+def _decode(stored):
+    if isinstance(stored, dict):
+        return base64.b64decode(stored['bytes'])
+    if isinstance(stored, str):
+        return stored
+    return tuple((string_to_tokentype(t), v) for t, v in stored)
+
+
+class HighlightCache(object):
+    """
+    Caches lexer token streams and formatted output keyed on (pygments and
+    pygments_red versions, lexer class, lexer options, style class,
+    formatter class and options, content hash).
+
+    At most `maxsize` entries (and, if given, `maxbytes` characters or
+    bytes of cached output) are kept in memory, evicting the least recently used
+    ones. If `path` is given, entries are also stored in a sqlite database
+    at that path, so they survive restarts; lookups that miss in memory
+    fall back to it. Entries are stored as JSON, so a shared database file
+    holds no code.
+
+    Hit and miss counts are kept in `hits` and `misses` (see also stats()).
+    A cache may be shared between threads.
+    """
+
+    def __init__(self, maxsize=256, maxbytes=None, path=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.nbytes = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute('CREATE TABLE IF NOT EXISTS highlight (key TEXT PRIMARY KEY, value BLOB)')
+            self.db.commit()
+
+    def key(self, kind, text, lexer, formatter=None):
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        parts = [kind, pygments.__version__, pygments_red.__version__,
+                 _class_name(type(lexer)), _options_key(lexer.options)]
+        if formatter is not None:
+            parts += [_style_name(formatter), _class_name(type(formatter)), _options_key(formatter.options)]
+        parts.append(digest)
+        return '\0'.join(parts)
+
+    def get_tokens(self, text, lexer):
+        """
+        Returns the list of (token type, value) pairs for `text`, as
+        produced by `lexer.get_tokens` (a new list on every call).
+        """
+        key = self.key('tokens', text, lexer)
+        ans = self.lookup(key)
+        if ans is None:
+            ans = tuple(lexer.get_tokens(text))
+            self.store(key, ans)
+        return list(ans)
+
+    def highlight(self, text, lexer, formatter):
+        """
+        Returns `pygments.highlight(text, lexer, formatter)` (bytes if the
+        formatter has an output encoding).
+        """
+        from pygments import highlight
+        key = self.key('output', text, lexer, formatter)
+        ans = self.lookup(key)
+        if ans is None:
+            ans = highlight(text, lexer, formatter)
+            self.store(key, ans)
+        return ans
+
+    def lookup(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            row = None
+            if self.db is not None:
+                row = self.db.execute('SELECT value FROM highlight WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            stored = json.loads(row[0])
+        ans = _decode(stored)
+        self.remember(key, ans)
+        return ans
+
+    def store(self, key, value):
+        if self.db is not None:
+            with self.lock:
+                self.db.execute('INSERT OR REPLACE INTO highlight (key, value) VALUES (?, ?)',
+                                (key, json.dumps(_encode(value), separators=(',', ':'))))
+                self.db.commit()
+        self.remember(key, value)
+
+    def remember(self, key, value):
+        size = len(value) if isinstance(value, (str, bytes)) else sum(len(v) for _, v in value)
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.nbytes += size
+            while self.entries and (len(self.entries) > self.maxsize or
+                                    (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+                self.nbytes -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self, disk=False):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            if disk and self.db is not None:
+                self.db.execute('DELETE FROM highlight')
+                self.db.commit()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'disk_hits': self.disk_hits,
+                'entries': len(self.entries), 'bytes': self.nbytes}
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
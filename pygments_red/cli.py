@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+    Batch highlighter
+    ~~~~~~~~~~~~~~~~~
+
+    * highlights whole source trees with the pygments_red lexers
+    * spreads the work over a pool of processes with warm lexers
+    * skips files that have not changed since the previous run
+    * also highlights the dialects of the files in $PYGMENTS_RED_DIALECTS
+"""
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import collections
+import multiprocessing
+
+import pygments_red
+from pygments_red import dialects
+from pygments_red.detect import lexer_for_filename
+from pygments import highlight
+from pygments.formatters import get_formatter_by_name
+
+STYLES = {
+    'redstyle':     pygments_red.RedStyle,
+    'github':       pygments_red.GithubStyle,
+    'githubcustom': pygments_red.GithubCustom1Style,
+}
+
+MANIFEST = '.pygments_red_manifest.json'
+
+
+def make_formatter(name, style, options):
+    return get_formatter_by_name(name, style=STYLES.get(style, style), **options)
+
+def collect(paths):
+    """
+    Expands directories and glob patterns into (path, output name) pairs
+    for all files one of the pygments_red lexers handles.
+    """
+    ans = []
+    for arg in paths:
+        if os.path.isdir(arg):
+            for root, dirs, files in os.walk(arg):
+                dirs.sort()
+                for f in sorted(files):
+                    path = os.path.join(root, f)
+                    ans.append((path, os.path.relpath(path, arg)))
+        else:
+            for path in sorted(glob.glob(arg)) or [arg]:
+                rel = os.path.relpath(path)
+                ans.append((path, os.path.basename(path) if rel.startswith(os.pardir) else rel))
+    return [(p, rel) for p, rel in ans if os.path.isfile(p) and lexer_for_filename(p) is not None]
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# ----------------------------------------------------
+#  worker processes keep one lexer per class (made on first use) and one
+#  formatter around
+
+_worker = {}
+
+def _init_worker(formatter, style, options):
+    dialects.load_configured()
+    _worker['lexers'] = {}
+    _worker['formatter'] = make_formatter(formatter, style, options)
+
+def _render(job):
+    # returns (source, size, None), or (source, None, error message) for a
+    # file that could not be highlighted, so that the others go on
+    src, dst = job
+    try:
+        cls = lexer_for_filename(src)
+        lexer = _worker['lexers'].get(cls)
+        if lexer is None:
+            lexer = _worker['lexers'][cls] = cls()
+        with open(src, 'rb') as f:
+            code = f.read().decode('utf-8')
+        out = highlight(code, lexer, _worker['formatter'])
+        d = os.path.dirname(dst)
+        if d and not os.path.isdir(d):
+            try:
+                os.makedirs(d)
+            except OSError:
+                if not os.path.isdir(d): raise
+        with open(dst, 'wb') as f:
+            f.write(out.encode('utf-8') if not isinstance(out, bytes) else out)
+    except Exception as e:
+        return src, None, '%s: %s' % (type(e).__name__, e)
+    return src, len(code), None
+
+# ----------------------------------------------------
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='pygments_red',
+                                     description='Highlight source trees with the pygments_red lexers.')
+    parser.add_argument('paths', nargs='+', help='files, directories or glob patterns')
+    parser.add_argument('-o', '--output', default='.', help='output directory (default: current)')
+    parser.add_argument('-f', '--formatter', default='html', help='formatter name (default: html)')
+    parser.add_argument('-S', '--style', default='githubcustom', help='style name (default: githubcustom)')
+    parser.add_argument('-O', '--option', action='append', default=[], metavar='KEY=VALUE',
+                        help='formatter option, may be repeated')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--force', action='store_true', help='ignore the manifest and redo every file')
+    opts = parser.parse_args(args)
+    dialects.load_configured()
+
+    options = dict(o.split('=', 1) for o in opts.option)
+    formatter = make_formatter(opts.formatter, opts.style, options)
+    ext = formatter.filenames[0].lstrip('*') if formatter.filenames else '.out'
+    config = [opts.formatter, opts.style, sorted(options.items())]
+
+    manifest_path = os.path.join(opts.output, MANIFEST)
+    manifest = {}
+    if not opts.force and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('config') != config:
+            manifest = {}
+    files = manifest.get('files', {})
+
+    start = time.time()
+    jobs = []
+    skipped = 0
+    failed = 0
+    # inputs with the same output path (e.g. m.red in two directory
+    # arguments) fail rather than overwrite each other; a file named twice
+    # is done once
+    outputs = collections.OrderedDict()
+    for src, rel in collect(opts.paths):
+        outputs.setdefault(os.path.abspath(src), (src, os.path.join(opts.output, rel + ext)))
+    outputs = list(outputs.values())
+    sources = collections.defaultdict(list)
+    for src, dst in outputs:
+        sources[os.path.normcase(os.path.abspath(dst))].append(src)
+    for src, dst in outputs:
+        clash = sources[os.path.normcase(os.path.abspath(dst))]
+        if len(clash) > 1:
+            sys.stderr.write('%s: output %s is also the output of %s\n' %
+                             (src, dst, ', '.join(p for p in clash if p != src)))
+            files.pop(os.path.abspath(src), None)
+            failed += 1
+            continue
+        st = os.stat(src)
+        key = os.path.abspath(src)
+        entry = files.get(key)
+        if entry is not None and os.path.exists(dst):
+            if entry['mtime'] == st.st_mtime and entry['size'] == st.st_size:
+                skipped += 1
+                continue
+            digest = file_digest(src)
+            if entry['sha1'] == digest:
+                entry['mtime'] = st.st_mtime
+                skipped += 1
+                continue
+        jobs.append((src, dst))
+
+    nbytes = 0
+    done = 0
+    pool = None
+    try:
+        if opts.jobs > 1 and len(jobs) > 1:
+            pool = multiprocessing.Pool(opts.jobs, _init_worker, (opts.formatter, opts.style, options))
+            results = pool.imap_unordered(_render, jobs, max(1, len(jobs) // (4 * opts.jobs)))
+        else:
+            _init_worker(opts.formatter, opts.style, options)
+            results = map(_render, jobs)
+        for src, size, error in results:
+            key = os.path.abspath(src)
+            if error is not None:
+                sys.stderr.write('%s: %s\n' % (src, error))
+                files.pop(key, None)
+                failed += 1
+                continue
+            st = os.stat(src)
+            files[key] = {'mtime': st.st_mtime, 'size': st.st_size, 'sha1': file_digest(src)}
+            nbytes += size
+            done += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        # what is done is not redone next time, even after an interruption
+        if not os.path.isdir(opts.output):
+            os.makedirs(opts.output)
+        with open(manifest_path, 'w') as f:
+            json.dump({'config': config, 'files': files}, f, indent=1, sort_keys=True)
+
+        elapsed = max(time.time() - start, 1e-9)
+        sys.stderr.write('%d files highlighted, %d unchanged, %d failed, %.1f KB in %.2fs (%.1f files/s, %.1f KB/s)\n' %
+                         (done, skipped, failed, nbytes / 1024.0, elapsed,
+                          done / elapsed, nbytes / 1024.0 / elapsed))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+    Lexer lookup
+    ~~~~~~~~~~~~
+
+    * lexer class by file name, mimetype or alias, from an index built once
+    * lexer class guessing from content, over the pygments_red lexers only
+"""
+import os
+import fnmatch
+
+import pygments_red
+
+# in order of preference when several lexers claim a name (then the
+# lexers of the dialects added with dialects.register)
+LEXERS = ['RedLexer', 'ARbyLexer', 'SlangLexer', 'SunnyLexer', 'Ruby193Lexer',
+          'RedHtmlLexer', 'EredLexer', 'ErrbLexer', 'HandlebarsHtmlLexer', 'HandlebarsLexer']
+
+_index = {}
+
+def index():
+    """
+    Returns the lookup tables: {'extensions': {'.red': cls, ...},
+    'patterns': [(glob, cls), ...], 'mimetypes': {...}, 'aliases': {...},
+    'lexers': [cls, ...]}. File name patterns of the form `*.ext` go into
+    the extension table, the others are matched one by one.
+    """
+    if not _index:
+        from pygments_red import dialects
+        lexers = [getattr(pygments_red, name) for name in LEXERS] + dialects.registered()
+        extensions, patterns, mimetypes, aliases = {}, [], {}, {}
+        for cls in lexers:
+            for pattern in cls.filenames:
+                ext = pattern[1:]
+                if pattern.startswith('*.') and not any(c in ext for c in '*?[') and ext.count('.') == 1:
+                    extensions.setdefault(ext, cls)
+                else:
+                    patterns.append((pattern, cls))
+            for mimetype in cls.mimetypes:
+                mimetypes.setdefault(mimetype, cls)
+            for alias in cls.aliases:
+                aliases.setdefault(alias, cls)
+        _index.update(extensions=extensions, patterns=patterns, mimetypes=mimetypes,
+                      aliases=aliases, lexers=lexers)
+    return _index
+
+def reset():
+    """
+    Drops the lookup tables; the next lookup builds them again (called when
+    a dialect is registered).
+    """
+    _index.clear()
+
+def lexer_for_filename(filename):
+    """
+    Returns the pygments_red lexer class for `filename`, or None.
+    """
+    name = os.path.basename(filename)
+    idx = index()
+    cls = idx['extensions'].get(os.path.splitext(name)[1])
+    if cls is not None:
+        return cls
+    for pattern, cls in idx['patterns']:
+        if fnmatch.fnmatch(name, pattern):
+            return cls
+    return None
+
+def lexer_for_mimetype(mimetype):
+    """
+    Returns the pygments_red lexer class for `mimetype`, or None.
+    """
+    return index()['mimetypes'].get(mimetype)
+
+def lexer_for_alias(alias):
+    """
+    Returns the pygments_red lexer class with the alias `alias`, or None.
+    """
+    return index()['aliases'].get(alias.lower())
+
+def guess_lexer(text, filename=None):
+    """
+    Returns the pygments_red lexer class whose analyse_text scores `text`
+    highest (the first one in LEXERS on a tie), or None if none of them
+    recognizes it. A known `filename` decides without looking at the
+    text. Only the beginning of the text is looked at (see
+    base.ANALYSE_SIZE).
+    """
+    if filename is not None:
+        cls = lexer_for_filename(filename)
+        if cls is not None:
+            return cls
+    best, best_score = None, 0.0
+    for cls in index()['lexers']:
+        score = cls.analyse_text(text)
+        if score > best_score:
+            best, best_score = cls, score
+            if score == 1.0: break
+    return best
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+    Keyword dialects
+    ~~~~~~~~~~~~~~~~
+
+    * the keywords of the Ruby-based dialects (ARby, Red, Slang) as data --- DIALECTS
+    * compiled once into frozen lookup tables --- class Dialect, function compile_dialect
+    * lexer classes for new dialects, e.g. read from TOML --- functions register, load
+    * the dialect files named by $PYGMENTS_RED_DIALECTS, loaded on first lookup
+      of a class that is not registered yet (entry points, unpickling) --- function load_configured
+"""
+from pygments.token import string_to_tokentype
+
+from pygments_red.base import signatures
+
+import os
+import json
+import collections
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+"""
+--------------------------------------------------------------------------------
+  A dialect is a dict with
+
+    name, aliases, filenames   what the lexer class is called and handles
+    extends                    the key of the dialect it builds on
+    keywords                   named groups of words that become Keyword;
+                               the words of the group "class_gen" generate
+                               classes (the constant after one becomes
+                               Name.Class, and top-level blocks start with
+                               them)
+    names                      {token type name: words}, the Name tokens
+                               that become that token type (e.g. emphasized
+                               functions); tried in order, before keywords
+    signatures                 [(regex, score), ...] for analyse_text
+
+  A dialect that extends another one inherits its keyword groups and names,
+  group by group and token type by token type: a group given again
+  replaces the inherited one (an empty list drops it).
+--------------------------------------------------------------------------------
+"""
+
+DIALECTS = {
+    'arby': {
+        'name': 'ARby',
+        'keywords': {
+            'class_gen': ['sig', 'abstract', 'alloy_model', 'alloy_module', 'alloy', 'enum'],
+            'ops': ['extends', 'set', 'seq', 'one', 'lone', 'no', 'all', 'some', 'exist'],
+            'fun': ['fun', 'pred', 'assertion', 'fact', 'check', 'run', 'this', 'not_in?', 'in?', 'open', 'solve',
+                    'procedure', 'inst', 'exactly', 'ordered', 'iden', 'univ', 'let', 'one_one', 'one_lone', 'lone_one'],
+        },
+    },
+    'red': {
+        'name': 'Red',
+        'extends': 'arby',
+        'keywords': {
+            'class_gen': ['abstract_record', 'abstract_machine', 'record', 'machine', 'event', 'policy'],
+            'red': ['requires', 'ensures', 'from', 'to', 'params', 'principal', 'restrict', 'refs', 'owns', 'fields',
+                    'success_note', 'error_note', 'global', 'write', 'filter', 'filterNot', 'read'],
+            'fun': [],
+        },
+        'names': {
+            # strongly emphasized functions
+            'Keyword.Pseudo': ['render'],
+            # emphasized functions
+            'Name.Builtin.Pseudo': ['reject', 'unless', 'when'],
+        },
+    },
+    'slang': {
+        'name': 'Slang',
+        'extends': 'arby',
+        'keywords': {
+            'class_gen': ['view', 'component', 'data', 'trusted', 'abstract', 'model', 'critical', 'operation'],
+            'fun': [],
+        },
+        'names': {
+            'Name.Function': ['critical', 'trusted'],
+            'Generic.Inserted': ['creates', 'guard', 'dynamic', 'effects', 'sends', 'triggers', 'response'],
+        },
+    },
+}
+
+# the lexer classes of the built-in dialects (in pygments_red.ruby)
+BUILTIN = {'arby': 'ARbyLexer', 'red': 'RedLexer', 'slang': 'SlangLexer'}
+
+# dialect files (TOML or JSON, separated by os.pathsep) loaded when a lexer
+# class is looked up in this module before it is registered
+PATH_VARIABLE = 'PYGMENTS_RED_DIALECTS'
+
+class Dialect(collections.namedtuple('Dialect', 'key name keywords class_gen_keywords names')):
+    """
+    A dialect compiled for lookup: `keywords` and `class_gen_keywords` are
+    frozensets, `names` a tuple of (token type, frozenset of words).
+    """
+    __slots__ = ()
+
+_compiled = {}
+_lexers = {}
+_configured = []
+
+def resolve(key):
+    """
+    Returns the dialect `key` with the groups and names of the dialects it
+    extends merged in.
+    """
+    spec = DIALECTS[key]
+    if 'extends' not in spec:
+        return dict(spec, keywords=dict(spec.get('keywords', {})), names=dict(spec.get('names', {})))
+    ans = resolve(spec['extends'])
+    ans.update((k, v) for k, v in spec.items() if k not in ('keywords', 'names'))
+    ans['keywords'].update(spec.get('keywords', {}))
+    ans['names'].update(spec.get('names', {}))
+    return ans
+
+def compile_dialect(key):
+    """
+    Returns the Dialect for `key`, compiled on first use and then shared.
+    """
+    ans = _compiled.get(key)
+    if ans is None:
+        spec = resolve(key)
+        ans = _compiled[key] = Dialect(
+            key=key,
+            name=spec['name'],
+            keywords=frozenset(w for words in spec['keywords'].values() for w in words),
+            class_gen_keywords=frozenset(spec['keywords'].get('class_gen', ())),
+            names=tuple((string_to_tokentype(t), frozenset(words)) for t, words in spec['names'].items() if words),
+        )
+    return ans
+
+def lexer_class(key):
+    """
+    Returns the lexer class of dialect `key`.
+    """
+    cls = _lexers.get(key)
+    if cls is None and key in BUILTIN:
+        from pygments_red import ruby
+        cls = _lexers[key] = getattr(ruby, BUILTIN[key])
+    if cls is None:
+        raise KeyError('no dialect %r registered' % key)
+    return cls
+
+def register(key, spec):
+    """
+    Adds the dialect `spec` (see DIALECTS) under `key` and returns its lexer
+    class: a subclass of the lexer of the dialect it extends (ARbyLexer by
+    default) that only sets data, so that its tokens go through the same
+    compiled rewrite table as those of the built-in dialects. The class is
+    bound in this module under its name, found by alias and file name with
+    pygments_red.detect, and its instances pickle with their dialect (so
+    that they load in processes that never registered it). To make it known
+    to pygments, point an entry point at it and name its file in
+    $PYGMENTS_RED_DIALECTS.
+    """
+    from pygments_red import ruby, detect
+    if key in DIALECTS:
+        raise ValueError('dialect %r already exists' % key)
+    name = '%sLexer' % ''.join(c for c in spec['name'] if c.isalnum())
+    if name in globals():
+        raise ValueError('a dialect lexer named %s already exists' % name)
+    base = lexer_class(spec['extends']) if 'extends' in spec else ruby.ARbyLexer
+    DIALECTS[key] = spec
+    attrs = {
+        '__module__': __name__,
+        '__doc__': 'Lexer for the %s dialect (see pygments_red.dialects).' % spec['name'],
+        '__reduce__': _reduce_lexer,
+        'name': spec['name'],
+        'aliases': list(spec.get('aliases', [key])),
+        'filenames': list(spec.get('filenames', [])),
+        'mimetypes': list(spec.get('mimetypes', [])),
+        'dialect': compile_dialect(key),
+    }
+    if 'signatures' in spec:
+        attrs['analyse_text'] = signatures(*[tuple(s) for s in spec['signatures']])
+    cls = _lexers[key] = globals()[name] = type(name, (base,), attrs)
+    detect.reset()
+    return cls
+
+def _reduce_lexer(lexer):
+    # the specs of the registered dialects the lexer's dialect builds on,
+    # outermost first
+    chain = []
+    key = lexer.dialect.key
+    while key not in BUILTIN:
+        chain.insert(0, (key, DIALECTS[key]))
+        key = DIALECTS[key].get('extends')
+        if key is None: break
+    return _restore_lexer, (lexer.dialect.key, chain), lexer.__dict__
+
+def _restore_lexer(key, chain):
+    if key not in _lexers:
+        load_configured()
+    for k, spec in chain:
+        if k not in _lexers:
+            register(k, spec)
+    # the pickled state then replaces that of the new instance
+    return _lexers[key]()
+
+def registered():
+    """
+    Returns the lexer classes of the dialects added with register.
+    """
+    return [cls for key, cls in _lexers.items() if key not in BUILTIN]
+
+def load(path):
+    """
+    Registers the dialects of the TOML (Python 3.11+) or JSON file `path`,
+    a table of dialects by key, e.g.
+
+        [myred]
+        name = "MyRed"
+        extends = "red"
+        aliases = ["myred"]
+        filenames = ["*.myred"]
+        keywords.mine = ["audit", "tenant"]
+        names."Keyword.Pseudo" = ["render", "redirect"]
+
+    and returns their lexer classes, by key. Dialects may extend each other
+    in any order within a file.
+    """
+    if path.endswith('.json'):
+        with open(path) as f:
+            specs = json.load(f)
+    else:
+        if tomllib is None:
+            raise ImportError('reading TOML dialects needs Python 3.11 (tomllib); use JSON instead')
+        with open(path, 'rb') as f:
+            specs = tomllib.load(f)
+    ans = {}
+    pending = dict(specs)
+    while pending:
+        ready = [key for key, spec in pending.items() if spec.get('extends') not in pending]
+        if not ready:
+            raise ValueError('dialects extend each other in a cycle: %s' % ', '.join(sorted(pending)))
+        for key in ready:
+            ans[key] = register(key, pending.pop(key))
+    return ans
+
+def load_configured():
+    """
+    Loads the dialect files named in $PYGMENTS_RED_DIALECTS (TOML or JSON,
+    separated by os.pathsep), once per process.
+    """
+    if not _configured:
+        _configured.append(os.environ.get(PATH_VARIABLE, ''))
+        for path in _configured[0].split(os.pathsep):
+            if path:
+                load(path)
+
+def __getattr__(name):
+    # lexer classes of dialects that are not registered yet in this process
+    # (a pygments entry point, a pickled class): load the configured files
+    # once and look again
+    if name.endswith('Lexer') and not _configured:
+        load_configured()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
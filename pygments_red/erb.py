@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+    ERB lexers
+    ~~~~~~~~~~
+
+    * ERB with batched lexing of the code fragments --- class RedErbLexer
+    * ERB with Ruby193Lexer --- class ErrbLexer
+    * ERB with RedLexer --- class EredLexer
+    * HTML + ERB with RedLexer --- class RedHtmlLexer
+"""
+try:
+    from pygments.lexers.html import HtmlLexer
+except ImportError:
+    from pygments.lexers.web import HtmlLexer
+from pygments.lexers.templates import ErbLexer
+from pygments.util import html_doctype_matches
+
+from pygments_red.base import RedDelegatingLexer, signatures, ANALYSE_SIZE
+from pygments_red.ruby import Ruby193Lexer, RedLexer
+
+import copy
+
+"""
+--------------------------------------------------------------------------------
+Like ERB, but the code fragments are lexed in one batch by a single warm
+RedLexerBase worker (see RedLexerBase.get_tokens_unprocessed_batch) instead
+of going through a fresh lexer pipeline each.
+
+ErbLexer's own splitting runs twice: first with a ruby lexer that only
+records the fragments, then with one that replays the batched tokens. The
+output is exactly that of ErbLexer with the same ruby lexer.
+--------------------------------------------------------------------------------
+"""
+class _FragmentRecorder(object):
+    def __init__(self):
+        self.fragments = []
+
+    def get_tokens_unprocessed(self, text):
+        self.fragments.append(text)
+        return iter(())
+
+class _FragmentReplayer(object):
+    def __init__(self, token_lists):
+        self.token_lists = iter(token_lists)
+
+    def get_tokens_unprocessed(self, text):
+        return iter(next(self.token_lists))
+
+class RedErbLexer(ErbLexer):
+
+    def get_tokens_unprocessed(self, text):
+        view = copy.copy(self)
+        view.ruby_lexer = _FragmentRecorder()
+        for _ in ErbLexer.get_tokens_unprocessed(view, text): pass
+        view.ruby_lexer = _FragmentReplayer(
+            self.ruby_lexer.get_tokens_unprocessed_batch(view.ruby_lexer.fragments))
+        return ErbLexer.get_tokens_unprocessed(view, text)
+
+"""
+--------------------------------------------------------------------------------
+Like ERB except that it uses Ruby193Lexer for ruby expressions
+--------------------------------------------------------------------------------
+"""
+class ErrbLexer(RedErbLexer):
+    name = 'ERRB'
+    aliases = ['erb', 'errb']
+    mimetypes = ['application/x-ruby-templating']
+    analyse_text = signatures(
+        (r'<%[\s\S]*?%>', 0.4),
+    )
+
+    def __init__(self, **options):
+        ErbLexer.__init__(self, **options)
+        self.ruby_lexer = Ruby193Lexer(**options)
+
+"""
+--------------------------------------------------------------------------------
+Like ERB except that it uses RedLexer for ruby expressions
+--------------------------------------------------------------------------------
+"""
+class EredLexer(RedErbLexer):
+    name = 'ERed'
+    aliases = ['erb', 'ered']
+    mimetypes = ['application/x-ruby-templating']
+    analyse_text = signatures(
+        (r'<%=?\s*(?:render|reject)\b', 0.5),
+        (r'<%[\s\S]*?%>', 0.35),
+    )
+
+    def __init__(self, **options):
+        ErbLexer.__init__(self, **options)
+        self.ruby_lexer = RedLexer(**options)
+
+"""
+--------------------------------------------------------------------------------
+Like RhtmlLexer except that it uses EredLexer for ruby expressions
+--------------------------------------------------------------------------------
+"""
+class RedHtmlLexer(RedDelegatingLexer):
+    name = 'RedHTML'
+    aliases = ['redhtml', 'html+ered', 'html+red']
+    filenames = ['*.redhtml']
+    mimetypes = ['text/html+red']
+
+    def __init__(self, **options):
+        super(RedHtmlLexer, self).__init__(HtmlLexer, EredLexer, **options)
+
+    def analyse_text(text):
+        rv = EredLexer.analyse_text(text) - 0.01
+        if html_doctype_matches(text[:ANALYSE_SIZE]):
+            # one more than the XmlErbLexer returns
+            rv += 0.5
+        return rv
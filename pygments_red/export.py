@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+    Token stream export
+    ~~~~~~~~~~~~~~~~~~~
+
+    * run-length merged token streams with offsets into the text --- class TokenStream
+    * compact binary and JSON serialization, to lex once and render many times
+"""
+from pygments.token import string_to_tokentype
+
+import sys
+import json
+import array
+import struct
+
+MAGIC = b'PRTS'
+VERSION = 1
+HEADER = '<BBIIII'
+
+
+class TokenStream(object):
+    """
+    The tokens of a text, with adjacent tokens of the same type merged.
+
+    `types` lists the token types that occur, `kinds[i]` is the index into
+    `types` of the i-th run and `ends[i]` the offset in `text` where it
+    ends (so run i is text[ends[i-1]:ends[i]]). Iterating gives (token
+    type, value) pairs, as Lexer.get_tokens does, so a stream can be passed
+    to any formatter:
+
+        data = TokenStream.from_text(code, RedLexer()).to_bytes()    # once
+        ...
+        html = pygments.format(TokenStream.from_bytes(data), FastHtmlFormatter())
+
+    (htmlformat.FastHtmlFormatter renders streams without splitting them
+    back into tokens).
+    """
+
+    def __init__(self, text, types, kinds, ends):
+        self.text = text
+        self.types = types
+        self.kinds = kinds
+        self.ends = ends
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """
+        Builds a stream from (token type, value) pairs.
+        """
+        index = {}
+        types = []
+        kinds = array.array('H')
+        ends = array.array('I')
+        values = []
+        end = 0
+        last = None
+        for token, value in tokens:
+            if not value: continue
+            end += len(value)
+            values.append(value)
+            if token is last:
+                ends[-1] = end
+                continue
+            kind = index.get(token)
+            if kind is None:
+                kind = index[token] = len(types)
+                types.append(token)
+            kinds.append(kind)
+            ends.append(end)
+            last = token
+        return cls(''.join(values), types, kinds, ends)
+
+    @classmethod
+    def from_text(cls, text, lexer):
+        return cls.from_tokens(lexer.get_tokens(text))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        text, types = self.text, self.types
+        start = 0
+        for kind, end in zip(self.kinds, self.ends):
+            yield types[kind], text[start:end]
+            start = end
+
+    def __eq__(self, other):
+        return (isinstance(other, TokenStream) and self.text == other.text and self.types == other.types
+                and self.kinds == other.kinds and self.ends == other.ends)
+
+    def __ne__(self, other):
+        return not self == other
+
+    # ----------------------------------------------------
+    #  JSON: {"format": "pygments_red.tokens", "version": 1, "types": [names],
+    #         "runs": [kind, end, kind, end, ...], "text": text}
+
+    def to_json(self, text=True, **kwds):
+        runs = [None] * (2 * len(self.kinds))
+        runs[0::2] = self.kinds
+        runs[1::2] = self.ends
+        obj = {'format': 'pygments_red.tokens', 'version': VERSION,
+               'types': [str(t) for t in self.types], 'runs': runs}
+        if text:
+            obj['text'] = self.text
+        kwds.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwds)
+
+    @classmethod
+    def from_json(cls, data, text=None):
+        """
+        Reads a stream written by to_json; `text` must be given if it was
+        written without it.
+        """
+        obj = json.loads(data)
+        if obj.get('format') != 'pygments_red.tokens' or obj.get('version') != VERSION:
+            raise ValueError('not a pygments_red token stream (version %d)' % VERSION)
+        runs = obj['runs']
+        return cls._checked(obj.get('text', text), [string_to_tokentype(t) for t in obj['types']],
+                            array.array('H', runs[0::2]), array.array('I', runs[1::2]))
+
+    # ----------------------------------------------------
+    #  binary: MAGIC, version and flags bytes (1: the text is included),
+    #  little-endian u32 ntypes names-size nruns text-size, the type names
+    #  ("\n" separated, utf-8), nruns u16 kinds, nruns u32 ends, the utf-8 text
+
+    def to_bytes(self, text=True):
+        names = '\n'.join(str(t) for t in self.types).encode('utf-8')
+        body = self.text.encode('utf-8') if text else b''
+        kinds, ends = self.kinds, self.ends
+        if sys.byteorder == 'big':
+            kinds, ends = array.array('H', kinds), array.array('I', ends)
+            kinds.byteswap()
+            ends.byteswap()
+        return b''.join([MAGIC, struct.pack(HEADER, VERSION, int(text), len(self.types), len(names), len(kinds), len(body)),
+                         names, kinds.tobytes(), ends.tobytes(), body])
+
+    @classmethod
+    def from_bytes(cls, data, text=None):
+        """
+        Reads a stream written by to_bytes; `text` must be given if it was
+        written without it.
+        """
+        data = memoryview(data)
+        if bytes(data[:4]) != MAGIC or data[4] != VERSION:
+            raise ValueError('not a pygments_red token stream (version %d)' % VERSION)
+        _, flags, ntypes, nnames, nruns, nbody = struct.unpack_from(HEADER, data, 4)
+        pos = 4 + struct.calcsize(HEADER)
+        names = bytes(data[pos:pos+nnames]).decode('utf-8').split('\n') if ntypes else []
+        pos += nnames
+        kinds = array.array('H')
+        kinds.frombytes(data[pos:pos+2*nruns])
+        pos += 2 * nruns
+        ends = array.array('I')
+        ends.frombytes(data[pos:pos+4*nruns])
+        pos += 4 * nruns
+        if sys.byteorder == 'big':
+            kinds.byteswap()
+            ends.byteswap()
+        if flags & 1:
+            text = bytes(data[pos:pos+nbody]).decode('utf-8')
+        return cls._checked(text, [string_to_tokentype(t) for t in names], kinds, ends)
+
+    @classmethod
+    def _checked(cls, text, types, kinds, ends):
+        if text is None:
+            raise ValueError('token stream was exported without its text')
+        if (ends[-1] if ends else 0) != len(text):
+            raise ValueError('token stream does not match the text (%d vs %d characters)'
+                             % (ends[-1] if ends else 0, len(text)))
+        return cls(text, types, kinds, ends)
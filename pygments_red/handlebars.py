@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+    Handlebars lexers
+    ~~~~~~~~~~~~~~~~~
+
+    * Handlebars tags only --- class HandlebarsLexer
+    * HTML + Handlebars --- class HandlebarsHtmlLexer
+"""
+from pygments.lexer import Lexer
+try:
+    from pygments.lexers.html import HtmlLexer
+except ImportError:
+    from pygments.lexers.web import HtmlLexer
+from pygments.token import Text, Keyword, Name, Comment, String, Number, Operator, Other, Error
+
+from pygments.util import html_doctype_matches
+
+from pygments_red.base import RedDelegatingLexer, signatures, ANALYSE_SIZE
+
+import re
+
+
+class HandlebarsLexer(Lexer):
+    """
+    Generic `handlebars <http://handlebarsjs.com/>` template lexer.
+
+    Highlights only the Handlebars template tags (stuff between `{{` and `}}`).
+    Everything else is left for a delegating lexer.
+
+    Tag boundaries are found with str.find rather than a regex per
+    character run, and everything between tags is emitted as a single
+    `Other` token. Comments (`{{! ... }}` and `{{!-- ... --}}`) may span
+    several lines; the body of a raw block (`{{{{raw}}}} ... {{{{/raw}}}}`)
+    is left as `Other`.
+    """
+
+    name = "Handlebars"
+    aliases = ['handlebars']
+
+    analyse_text = signatures(
+        (r'\{\{[#/](?:each|if|unless|with)\b', 0.6),
+        (r'\{\{(?:else|!--)|\{\{\{\{?[a-zA-Z]', 0.3),
+        (r'\{\{[#/>]?\s*[a-zA-Z][\w.-]*[^{}]*\}\}', 0.1),
+    )
+
+    # the rules of the tag state, tried in order
+    tag_re = re.compile(r"""
+          (?P<ws>\s+)
+        | (?P<close3>\}\}\})
+        | (?P<close2>\}\})
+        | (?P<kw_pre>[\#/]*)(?P<kw>each|if|unless|else|with|log|in)
+        | (?P<block_pre>[\#/])(?P<block>\w+)
+        | (?P<attr>\w+)(?P<attr_eq>=)
+        | (?P<dq>:?"(\\\\|\\"|[^"])*")
+        | (?P<sq>:?'(\\\\|\\'|[^'])*')
+        | (?P<var>[a-zA-Z][a-zA-Z0-9_-]*|\.[a-zA-Z0-9_]+)
+        | (?P<num>[0-9](\.[0-9]*)?(eE[+-][0-9])?[flFLdD]?|0[xX][0-9a-fA-F]+[Ll]?)
+        """, re.VERBOSE)
+
+    # what each alternative of tag_re yields, keyed by its last group: either
+    # the token type of the whole match or (group, token type) pairs
+    tag_actions = {
+        'ws':      Text,
+        'close3':  Comment.Special,
+        'close2':  Comment.Preproc,
+        'kw':      [('kw_pre', Keyword), ('kw', Keyword)],
+        'block':   [('block_pre', Name.Function), ('block', Name.Function)],
+        'attr_eq': [('attr', Name.Attribute), ('attr_eq', Operator)],
+        'dq':      String.Double,
+        'sq':      String.Single,
+        'var':     Name.Variable,
+        'num':     Number,
+    }
+
+    def get_tokens_unprocessed(self, text):
+        pos = 0
+        end = len(text)
+        find = text.find
+        startswith = text.startswith
+        while pos < end:
+            start = find('{{', pos)
+            if start < 0:
+                yield pos, Other, text[pos:]
+                return
+            if start > pos:
+                yield pos, Other, text[pos:start]
+
+            if startswith('{{!--', start):
+                pos = self._find_end(text, '--}}', start + 5)
+                yield start, Comment, text[start:pos]
+            elif startswith('{{!', start):
+                pos = self._find_end(text, '}}', start + 3)
+                yield start, Comment, text[start:pos]
+            elif startswith('{{{{', start):
+                yield start, Comment.Special, '{{{{'
+                pos = yield from self._tag(text, start + 4, '}}}}')
+                if startswith('/', start + 4) or not startswith('}}}}', pos - 4):
+                    continue
+                # the body of a raw block is not lexed
+                body_end = find('{{{{/', pos)
+                if body_end < 0:
+                    body_end = end
+                if body_end > pos:
+                    yield pos, Other, text[pos:body_end]
+                pos = body_end
+            elif startswith('{{{', start):
+                yield start, Comment.Special, '{{{'
+                pos = yield from self._tag(text, start + 3, None)
+            else:
+                yield start, Comment.Preproc, '{{'
+                pos = yield from self._tag(text, start + 2, None)
+
+    def _find_end(self, text, close, pos):
+        end = text.find(close, pos)
+        return len(text) if end < 0 else end + len(close)
+
+    def _tag(self, text, pos, closing):
+        match = self.tag_re.match
+        actions = self.tag_actions
+        end = len(text)
+        while pos < end:
+            if closing is not None and text.startswith(closing, pos):
+                yield pos, Comment.Special, closing
+                return pos + len(closing)
+            m = match(text, pos)
+            if m is None:
+                yield pos, Error, text[pos]
+                pos += 1
+                continue
+            group = m.lastgroup
+            action = actions[group]
+            if action.__class__ is list:
+                for name, token in action:
+                    if m.group(name):
+                        yield m.start(name), token, m.group(name)
+            else:
+                yield pos, action, m.group()
+            pos = m.end()
+            if group == 'close3' or group == 'close2':
+                return pos
+        return pos
+
+
+class HandlebarsHtmlLexer(RedDelegatingLexer):
+    """
+    Subclass of the `HandlebarsLexer` that highlights unlexed data with the 
+    `HtmlLexer`.
+    """
+
+    name = "HTML+Handlebars"
+    aliases = ["html+handlebars"]
+    filenames = ['*.handlebars', '*.hbs']
+    mimetypes = ['text/html+handlebars', 'text/x-handlebars-template']
+
+    html_tag = re.compile(r'<[a-zA-Z][\w:-]*[\s/>]')
+
+    def __init__(self, **options):
+        super(HandlebarsHtmlLexer, self).__init__(HtmlLexer, HandlebarsLexer, **options)
+
+    def analyse_text(text):
+        rv = HandlebarsLexer.analyse_text(text)
+        if rv and html_doctype_matches(text[:ANALYSE_SIZE]):
+            rv += 0.5
+        elif rv and HandlebarsHtmlLexer.html_tag.search(text, 0, ANALYSE_SIZE):
+            rv += 0.1
+        return rv
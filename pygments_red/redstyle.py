@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+    Red style
+    ~~~~~~~~~
+
+    * tango with plain constants --- class RedStyle
+"""
+from pygments.styles.tango import TangoStyle
+from pygments.token import Name
+
+from pygments_red.styles import PrecomputedStyle
+
+
+class RedStyle(PrecomputedStyle):
+    default_style = ""
+
+    styles = {}
+    base = TangoStyle
+    for token in base.styles.keys():
+        styles[token] = base.styles[token]
+
+    const_style = '#000000'
+    styles[Name.Constant] = const_style
+    styles[Name.Class] = 'bold ' + const_style
+    styles[Name.Namespace] = const_style
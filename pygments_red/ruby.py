@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+    Ruby-based lexers
+    ~~~~~~~~~~~~~~~~~
+
+    * some fixes to RubyLexer --- class Ruby193Lexer
+    * lexer for Ruby + Alloy --- class ARbyLexer
+    * lexer for Ruby + Red --- class RedLexer
+    * lexer for Ruby + Slang --- class SlangLexer
+"""
+from pygments.lexer import bygroups, ExtendedRegexLexer
+from pygments.util import get_int_opt
+try:
+    from pygments.lexers.ruby import RubyLexer
+except ImportError:
+    from pygments.lexers.agile import RubyLexer
+from pygments.token import Token, Keyword, Name, String, Operator, Literal
+
+from pygments_red.base import RedLexerBase, signatures, _idx, _token, _value
+from pygments_red.dialects import compile_dialect
+
+import re
+
+"""
+--------------------------------------------------------------------------------
+(1) Change rule
+
+      (r'([a-zA-Z_][a-zA-Z0-9]*)(:)', bygroups(String.Symbol, Token.Punctuation)
+    to
+      (r'([a-zA-Z_][a-zA-Z0-9]*)(:)(?!:)', bygroups(String.Symbol, Token.Punctuation)
+
+    so that fully qualified names (e.g., X::Y::Z) are lexed properly, meaning
+
+      ('X', Constant), ('::', Operator), ('Y', Constant)
+    instead of
+      ('X', Symbol), (':', Punctuation), (':Y', Symbol)
+
+(2) Remove "name" from builtin keywords
+
+(3) Run the token table as RubyLexer does, as an ExtendedRegexLexer: the
+    heredoc and %-string callbacks need the lexer context
+
+(4) Yield the lines of a heredoc without an end once: RubyLexer yields them
+    as errors and then lexes them again
+--------------------------------------------------------------------------------
+"""
+def _heredoc_callback(lexer, match, ctx):
+    end = 0
+    for index, token, value in RubyLexer.heredoc_callback(lexer, match, ctx):
+        if index >= end:
+            yield index, token, value
+            end = index + len(value)
+    ctx.pos = max(ctx.pos, end)
+
+def _with_heredoc_callback(tokens):
+    for rules in tokens.values():
+        for i, rule in enumerate(rules):
+            if isinstance(rule, tuple) and rule[1] is RubyLexer.heredoc_callback:
+                rules[i] = (rule[0], _heredoc_callback) + rule[2:]
+    return tokens
+
+class _RubyRegexStage(object):
+    # what the RubyLexer callbacks get as the lexer: they lex heredocs and
+    # %-strings by calling get_tokens_unprocessed(context=...), which must
+    # give the tokens of the state machine alone
+    def __init__(self, tokens):
+        self._tokens = tokens
+
+    def get_tokens_unprocessed(self, text=None, context=None):
+        return ExtendedRegexLexer.get_tokens_unprocessed(self, text, context)
+
+class Ruby193Lexer(RedLexerBase):
+    name = 'Ruby193'
+    aliases = ['ruby193']
+    filenames = ['*.rb'] # just to have one if you whant to use
+
+    analyse_text = signatures(
+        (r'\A#!.*\bruby', 0.5),
+        (r'^\s*(?:def|class|module)\s+[\w:.]+', 0.1),
+    )
+
+    # own copy of every state, so that RubyLexer itself is left untouched
+    tokens = _with_heredoc_callback(dict((state, list(rules)) for state, rules in RubyLexer.tokens.items()))
+
+    string_rules = tokens['strings']
+    string_rules[4] = (r'([a-zA-Z_][a-zA-Z0-9_]*)(:)(?!:)', bygroups(String.Symbol, Token.Punctuation))
+
+    # =begin ... =end comments are lexed by a single rule
+    stream_hold = [(re.compile(r'=begin\s'), re.compile(r'\n=end'))]
+
+    def get_regex_tokens(self, text):
+        return _RubyRegexStage(self._tokens).get_tokens_unprocessed(text)
+
+    @classmethod
+    def get_rewrite_rules(cls):
+        return [
+            # remove weird lexing rule that says that "name" is a buildin keyword
+            (Name.Builtin, ['name'], cls.name_to_symbol),
+            (Name.Builtin, ['p', 'sub'], cls.builtin_to_name),
+        ]
+
+    def name_to_symbol(self, curr):
+        if _token(self.next()) is Token.Punctuation:
+            return (_idx(curr), Literal.String.Symbol, _value(curr))
+
+    def builtin_to_name(self, curr):
+        nt = self.next()
+        if _token(nt) is Token.Punctuation and _value(nt) == ":":
+            return (_idx(curr), Literal.String.Symbol, _value(curr))
+        else:
+            return (_idx(curr), Name, _value(curr))
+
+"""
+--------------------------------------------------------------------------------
+(1) Adds new keywords; the keywords, class generating keywords and
+    emphasized names come from the `dialect` of the class (see
+    pygments_red.dialects), so the lexers of other dialects only set it
+
+(2) Converts tokens following class generating keywords in Red from
+    Name.Constant to Name.Class
+
+(3) With the `jobs` option (number of processes), texts bigger than two
+    chunks are lexed in parallel, cut where a top-level block (a line
+    starting with a class generating keyword) begins; the tokens are the
+    same as without it (see RedLexerBase.get_tokens_unprocessed_parallel).
+    The `chunk_size` option sets the chunk size in characters.
+--------------------------------------------------------------------------------
+"""
+class ARbyLexer(Ruby193Lexer):
+    name = 'ARby'
+    aliases = ['arby']
+    filenames = ['*.arby'] # just to have one if you whant to use
+
+    analyse_text = signatures(
+        (r'^\s*alloy_(?:model|module)\b', 0.8),
+        (r'^\s*(?:abstract\s+)?sig\s+[A-Z]\w*', 0.4),
+        (r'^\s*(?:pred|fun|fact|assertion)\b.*[\[{]', 0.2),
+    )
+
+    # keywords, class generating keywords and emphasized names (see pygments_red.dialects)
+    dialect = compile_dialect('arby')
+
+    def __init__(self, **options):
+        Ruby193Lexer.__init__(self, **options)
+        self.jobs = get_int_opt(options, 'jobs', 0)
+        self.chunk_size = get_int_opt(options, 'chunk_size', 0) or None
+
+    def reset_state(self):
+        Ruby193Lexer.reset_state(self)
+        self.my_to_conv_to_sym = set()
+
+    @classmethod
+    def compile_chunk_sync(cls):
+        return re.compile(r'\n(?=(?:%s)\b)' % '|'.join(map(re.escape, sorted(cls.dialect.class_gen_keywords))))
+
+    def get_tokens_unprocessed(self, text):
+        if self.jobs > 1:
+            return self.get_tokens_unprocessed_parallel(text, self.jobs, self.chunk_size)
+        return Ruby193Lexer.get_tokens_unprocessed(self, text)
+
+    def to_conv_to_sym(self):
+        return self.my_to_conv_to_sym
+
+    @classmethod
+    def get_rewrite_rules(cls):
+        # convert Name tokens to the token types the dialect gives them (e.g. emphasized functions)
+        return [(Name, words, token) for token, words in cls.dialect.names] + [
+            # convert tokens to Keyword for the keywords of the dialect
+            (None, cls.dialect.keywords, Keyword),
+            # convert Name.Constant tokens to Name.Class for names following Red class generating keywords
+            (Name.Constant, None, cls.constant_to_class),
+            # convert braces to Operator to make them bold
+            (Token.Punctuation, ['{', '}'], Operator),
+            # convert named variables to simbols when preceeded by "[" and followed by ","
+            (None, None, cls.args_to_symbols),
+        ] + super(ARbyLexer, cls).get_rewrite_rules()
+
+    def constant_to_class(self, curr):
+        prev_token = _token(self.prev())
+        prev_is_keyword = (prev_token is Keyword) or (prev_token is Keyword.Pseudo)
+        if prev_is_keyword and _value(self.prev()) in self.dialect.class_gen_keywords:
+            return (_idx(curr), Name.Class, _value(curr))
+
+    def args_to_symbols(self, curr):
+        curr_idx, curr_token, curr_value = curr
+        pending = self.to_conv_to_sym()
+        if curr in pending:
+            pending.discard(curr)
+            return (curr_idx, Literal.String.Symbol, curr_value)
+        if curr_token is not Name or _value(self.prev()) not in ["[", "("]:
+            return None
+
+        # scan "name, name, ..., :symbol" within the lookahead window only
+        found = []
+        for nx in range(1, len(self.nows_queue) + 1, 2):
+            if _value(self.peek_ahead(nx)) != ",":
+                break
+            nextnext = self.peek_ahead(nx+1)
+            if _token(nextnext) is Literal.String.Symbol:
+                # tokens already behind us can never match again, so only
+                # those still in the lookahead window are kept
+                self.my_to_conv_to_sym = set(t for t in pending if _idx(t) is not None and _idx(t) > curr_idx)
+                self.my_to_conv_to_sym.update(found)
+                return (curr_idx, Literal.String.Symbol, curr_value)
+            found.append(nextnext)
+        pending.clear()
+        return None
+
+"""
+--------------------------------------------------------------------------------
+(1) Adds new keywords
+
+(2) Emphasize certain Red builtin functions (e.g., 'render')
+--------------------------------------------------------------------------------
+"""
+class RedLexer(ARbyLexer):
+    name = 'Red'
+    aliases = ['red']
+    filenames = ['*.red'] # just to have one if you whant to use
+
+    analyse_text = signatures(
+        (r'^\s*(?:abstract_)?(?:record|machine)\s+[A-Z]\w*(?:\s*<\s*[A-Z][\w:]*)?\s+do\b', 0.8),
+        (r'^\s*(?:event|policy)\s+[A-Z]\w*(?:\s*<\s*[A-Z][\w:]*)?\s+do\b', 0.7),
+        (r'^\s*(?:requires|ensures)\s*(?:do\b|\{)', 0.3),
+    )
+
+    dialect = compile_dialect('red')
+
+"""
+--------------------------------------------------------------------------------
+(1) Adds new keywords
+--------------------------------------------------------------------------------
+"""
+class SlangLexer(ARbyLexer):
+    name = 'Slang'
+    aliases = ['slang']
+    filenames = ['*.sarb'] # just to have one if you whant to use
+
+    analyse_text = signatures(
+        (r'^\s*component\s+[A-Z]\w*\s+do\b', 0.8),
+        (r'^\s*(?:critical\s+)?operation\s+\w+\s+do\b', 0.6),
+        (r'^\s*trusted\s+(?:model|data)\b', 0.5),
+    )
+
+    dialect = compile_dialect('slang')
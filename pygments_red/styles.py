@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+    Red styles
+    ~~~~~~~~~~
+
+    * styles with a precomputed token table --- class PrecomputedStyle
+    * shared formatters and style definitions --- get_formatter, get_style_defs
+    * GitHub-like styles --- classes GithubStyle, GithubCustom1Style
+
+    RedStyle lives in pygments_red.redstyle, since it needs tango.
+"""
+from pygments.style import Style, StyleMeta
+from pygments.token import Keyword, Name, Comment, Error, Operator, Generic, Literal, Text
+
+import functools
+
+try:
+    from types import MappingProxyType
+except ImportError:
+    MappingProxyType = dict
+
+
+class PrecomputedStyle(Style):
+    """
+    Style whose token -> style lookup is computed once per class.
+
+    `style_table()` maps every token type the style knows about (with the
+    definitions inherited from parent token types already merged in by
+    StyleMeta) to the read-only dict `style_for_token` returns for it, so
+    formatters do no per-token style resolution.
+    """
+
+    @classmethod
+    def style_table(cls):
+        if '_style_table' not in cls.__dict__:
+            cls._style_table = MappingProxyType(dict(
+                (token, MappingProxyType(StyleMeta.style_for_token(cls, token))) for token in cls._styles))
+        return cls._style_table
+
+    @classmethod
+    def style_for_token(cls, token):
+        table = cls.style_table()
+        if token in table:
+            return table[token]
+        return StyleMeta.style_for_token(cls, token)
+
+
+def _freeze(options):
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in options.items()))
+
+@functools.lru_cache(maxsize=128)
+def _formatter(name, style, options):
+    from pygments.formatters import get_formatter_by_name
+    return get_formatter_by_name(name, style=style, **dict(options))
+
+def get_formatter(name, style, **options):
+    """
+    Returns a formatter `name` (e.g. 'html', 'latex', 'terminal256') for
+    `style`, shared by all callers asking for the same configuration, so
+    that its style tables (CSS classes, ANSI escapes, ...) are only built
+    once. The formatter must not be modified.
+    """
+    try:
+        return _formatter(name, style, _freeze(options))
+    except TypeError:
+        # unhashable option values
+        from pygments.formatters import get_formatter_by_name
+        return get_formatter_by_name(name, style=style, **options)
+
+@functools.lru_cache(maxsize=128)
+def _style_defs(name, style, arg, options):
+    return _formatter(name, style, options).get_style_defs(*([] if arg is None else [arg]))
+
+def get_style_defs(name, style, arg=None, **options):
+    """
+    Returns (and caches) the style definitions (CSS rules, LaTeX commands,
+    ...) of formatter `name` for `style`, as `get_style_defs(arg)` would.
+    """
+    try:
+        return _style_defs(name, style, tuple(arg) if isinstance(arg, list) else arg, _freeze(options))
+    except TypeError:
+        return get_formatter(name, style, **options).get_style_defs(*([] if arg is None else [arg]))
+
+
+class GithubStyle(PrecomputedStyle):
+    default_style = ""
+
+    comment_color = '#8f5902' #'#777766'
+
+    styles = {
+        Comment:                      '#999988 italic',
+        Error:                        '#a61717 bg:#e3d2d2',
+        Keyword:                      '#000000 bold',
+        Operator:                     '#000000 bold',
+        Comment.Multiline:            '#999988 italic',
+        Comment.Preproc:              '#999999 bold italic',
+        Comment.Single:               '#999988 italic',
+        Comment.Special:              '#999999 bold italic',
+        Generic.Deleted:              '#000000 bg:#ffdddd',
+        Generic.Emph:                 '#000000 italic',
+        Generic.Error:                '#aa0000',
+        Generic.Heading:              '#999999',
+        Generic.Inserted:             '#000000 bg:#ddffdd',
+        Generic.Output:               '#888888',
+        Generic.Prompt:               '#555555',
+        Generic.Strong:               'bold',
+        Generic.Subheading:           '#aaaaaa',
+        Generic.Traceback:            '#aa0000',
+        Keyword.Constant:             '#000000 bold',
+        Keyword.Declaration:          '#000000 bold',
+        Keyword.Namespace:            '#000000 bold',
+        Keyword.Pseudo:               '#008080 bold',
+        Keyword.Reserved:             '#000000 bold',
+        Keyword.Type:                 '#445588 bold',
+        Literal.Number:               '#009999',
+        Literal.String:               '#d01040',
+        Name.Attribute:               '#008080',
+        Name.Builtin:                 '#0086B3',
+        Name.Class:                   '#445588 bold',
+        Name.Constant:                '#008080',
+        Name.Decorator:               '#3c5d5d bold',
+        Name.Entity:                  '#800080',
+        Name.Exception:               '#990000 bold',
+        Name.Function:                '#990000 bold',
+        Name.Label:                   '#990000 bold',
+        Name.Namespace:               '#555555',
+        Name.Tag:                     '#000080',
+        Name.Variable:                '#008080',
+        Operator.Word:                '#000000 bold',
+        Text.Whitespace:              '#bbbbbb',
+        Literal.Number.Float:         '#009999',
+        Literal.Number.Hex:           '#009999',
+        Literal.Number.Integer:       '#009999',
+        Literal.Number.Oct:           '#009999',
+        Literal.String.Backtick:      '#d01040',
+        Literal.String.Char:          '#d01040',
+        Literal.String.Doc:           '#d01040',
+        Literal.String.Double:        '#d01040',
+        Literal.String.Escape:        '#d01040',
+        Literal.String.Heredoc:       '#d01040',
+        Literal.String.Interpol:      '#d01040',
+        Literal.String.Other:         '#d01040',
+        Literal.String.Regex:         '#009926',
+        Literal.String.Single:        '#d01040',
+        Literal.String.Symbol:        '#990073',
+        Name.Builtin.Pseudo:          '#999999',
+        Name.Variable.Class:          '#008080',
+        Name.Variable.Global:         '#008080',
+        Name.Variable.Instance:       '#008080',
+        Literal.Number.Integer.Long:  '#009999'
+    }
+
+class GithubCustom1Style(PrecomputedStyle):
+    default_style = ""
+
+    comment_color = '#8f5902' #'#777766'
+
+    styles = {}
+    styles.update(GithubStyle.styles)
+    styles.update({
+        Comment:                      comment_color + ' italic',
+        Comment.Multiline:            comment_color + ' italic',
+        Comment.Preproc:              comment_color + ' bold italic',
+        Comment.Single:               comment_color + ' italic',
+        Comment.Special:              comment_color + ' bold italic',
+        Name.Constant:                '#008080', #'#445588', # '#004380', 
+        Name.Builtin.Pseudo:          '#004380 italic',
+        Keyword.Pseudo:               '#004380 italic bold'
+    })
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+    Sunny lexer
+    ~~~~~~~~~~~
+
+    * lexer for CoffeeScript + Sunny --- class SunnyLexer
+"""
+try:
+    from pygments.lexers.javascript import CoffeeScriptLexer
+except ImportError:
+    from pygments.lexers.web import CoffeeScriptLexer
+from pygments.lexer import bygroups
+from pygments.token import Keyword, Name, Operator, Whitespace
+
+from pygments_red.base import RedLexerBase, signatures
+
+import re
+
+
+def _words(words):
+    return '(?:%s)' % '|'.join(map(re.escape, words))
+
+# the Sunny rules are placed by the text of CoffeeScriptLexer's own rules as
+# of Pygments 2.14 (the floor in setup.py); older versions spell them
+# differently
+def _rule_index(rules, pattern):
+    for i, rule in enumerate(rules):
+        if isinstance(rule, tuple) and rule[0] == pattern:
+            return i
+    raise ValueError('CoffeeScriptLexer has no rule %r' % pattern)
+
+"""
+--------------------------------------------------------------------------------
+CoffeeScript + Sunny keywords. The keywords are told apart by the state
+machine itself, so no token goes through a rewriting pass:
+
+(1) CLASS_GEN_KEYWORDS and FUN_KEYWORDS become Keyword.Pseudo, unless they
+    are a member (right after a ".")
+
+(2) SYM_KEYWORDS followed by a colon (e.g., "requires:") become
+    Keyword.Pseudo
+
+(3) AUX_FUNS become Name.Builtin.Pseudo
+
+wherever a whole name, assigned name or piece of string or regex is one of
+them, exactly like the matching CoffeeScript token would have been.
+--------------------------------------------------------------------------------
+"""
+class SunnyLexer(RedLexerBase):
+    name = 'Sunny'
+    aliases = ['sunny']
+    filenames = ['*.sunny'] # just to have one if you whant to use
+
+    analyse_text = signatures(
+        (r'^\s*simport\b', 0.9),
+        (r'^\s*(?:abstract\s+)?(?:record|machine|event|user|client|server|policy)\s+[A-Z]\w*(?:\s*<\s*[A-Z]\w*)?\s*\{', 0.8),
+        (r'^\s*(?:requires|ensures|params):', 0.5),
+    )
+
+    CLASS_GEN_KEYWORDS = ['record', 'abstract', 'event', 'machine', 'user', 'client', 'server', 'policy', 'write_policy', 'read_policy']
+    FUN_KEYWORDS = ['simport', 'set', 'compose', 'seq'] 
+    SYM_KEYWORDS = ['requires', 'ensures', 'from', 'to', 'params', 'read', 'update', 'create', 'destroy', 'delete', '_precondition', 'precondition', 'push', 'pull', 'find']
+    SYM_COLON_KEYWORDS = [(s + ":") for s in SYM_KEYWORDS]
+                      # 'fun', 'pred', 'assertion', 'fact', 'check', 'run', 'this', 'not_in?', 'in?', 'open', 
+                      # 'solve', 'procedure', 'inst', 'exactly', 'ordered', 'iden', 'univ', 'let', 'one_one', 
+                      # 'one_lone', 'lone_one', 'lone_one']
+    AUX_FUNS = ['map', 'filter', 'filterNot', 'fold', 'findFirst', 'contains', 'remove', 'some', 'all', 'containsAll', 'allow', 'deny', 'equals']
+    
+    EXTRA_KEYWORDS = CLASS_GEN_KEYWORDS + FUN_KEYWORDS 
+
+    # print SYM_COLON_KEYWORDS
+
+    # own copy of every state, so that CoffeeScriptLexer itself is left untouched
+    tokens = dict((state, list(rules)) for state, rules in CoffeeScriptLexer.tokens.items())
+
+    extra_re, sym_colon_re, aux_re = _words(EXTRA_KEYWORDS), _words(SYM_COLON_KEYWORDS), _words(AUX_FUNS)
+
+    # "name: value" and "name = value"; the lookahead makes sure that the
+    # CoffeeScript rule would not take a longer name (e.g. "name: : value")
+    assign = r'(?!:[\w.:$]*\s*[:=]\s)(\s*)([:=])(\s+)'
+    assign_groups = (Whitespace, Operator, Whitespace)
+    root = tokens['root']
+    i = _rule_index(root, r'([$a-zA-Z_][\w.:$]*)(\s*)([:=])(\s+)')
+    root[i:i] = [
+        (r'(?<!\.)(' + extra_re + ')' + assign, bygroups(Keyword.Pseudo, *assign_groups), 'slashstartsregex'),
+        (r'(' + sym_colon_re + ')' + assign, bygroups(Keyword.Pseudo, *assign_groups), 'slashstartsregex'),
+        (r'(' + aux_re + ')' + assign, bygroups(Name.Builtin.Pseudo, *assign_groups), 'slashstartsregex'),
+    ]
+    i = _rule_index(root, r'@?[$a-zA-Z_][\w$]*')
+    root[i:i] = [
+        (r'(?<!\.)' + extra_re + r'(?![\w$])', Keyword.Pseudo),
+        (aux_re + r'(?![\w$])', Name.Builtin.Pseudo),
+    ]
+
+    # a piece of string or regex is as long as it can be
+    for state, end in [('strings', r'(?=[#\\\'"]|\Z)'), ('multilineregex', r'(?=[/#]|\Z)')]:
+        tokens[state][0:0] = [
+            (extra_re + end, Keyword.Pseudo),
+            (r'\s*' + sym_colon_re + r'\s*' + end, Keyword.Pseudo),
+            (aux_re + end, Name.Builtin.Pseudo),
+        ]
+    del root, i, assign, assign_groups, state, end
+
+    # ### ... ### comments are lexed by a single rule
+    stream_hold = [(re.compile(r'###[^#]'), re.compile(r'###'))]
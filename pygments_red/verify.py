@@ -0,0 +1,611 @@
+# -*- coding: utf-8 -*-
+"""
+    Lexer verification
+    ~~~~~~~~~~~~~~~~~~
+
+    * golden token streams of the benchmark corpora, pinned in golden.json
+    * differential fuzzing of the optimized code paths against reference
+      implementations, and checks that no lexer loses text
+    * superlinear lexing time on adversarial input
+    * command line, exits with status 1 on any failure, e.g.
+
+        python -m pygments_red.verify --fuzz 200
+        python -m pygments_red.verify --update      # after an intended change
+
+    Everything runs offline, on generated input only; the test suite
+    (tests/test_verify.py) runs the checks with a few fuzzed inputs.
+"""
+try:
+    from pygments.lexers.javascript import CoffeeScriptLexer
+except ImportError:
+    from pygments.lexers.web import CoffeeScriptLexer
+from pygments.lexer import RegexLexer, DelegatingLexer, bygroups
+from pygments.lexers.templates import ErbLexer
+from pygments.formatters import HtmlFormatter
+from pygments.token import Token, Text, Keyword, Name, Comment, String, Number, Operator, Other
+
+import pygments
+import pygments_red
+from pygments_red.base import RedLexerBase, RedDelegatingLexer, _idx, _value
+from pygments_red.erb import RedErbLexer
+from pygments_red.bench import LEXERS, GENERATORS, corpus, _ident
+from pygments_red.export import TokenStream
+from pygments_red.htmlformat import FastHtmlFormatter
+
+import os
+import re
+import sys
+import copy
+import json
+import time
+import bisect
+import random
+import hashlib
+import argparse
+import collections
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden.json')
+GOLDEN_SIZE = 20000
+GOLDEN_SEEDS = [0, 1]
+GOLDEN_BLOCK = 256
+
+"""
+--------------------------------------------------------------------------------
+  Reference implementations: the straightforward (slow) way of computing
+  what the optimized code paths compute.
+--------------------------------------------------------------------------------
+"""
+
+def reference_tokens(lexer, text):
+    """
+    The tokens lexer.get_tokens_unprocessed(text) should return, for a
+    RedLexerBase lexer: the regex stage runs to the end first, then every
+    token is rewritten by walking get_rewrite_rules in order (no dispatch
+    index), with the lookahead window (the non-text tokens after it) and
+    the lookbehind taken from the complete token lists.
+    """
+    worker = copy.copy(lexer)
+    worker.reset_state()
+    return reference_rewrite(worker, list(worker.get_regex_tokens(text)))
+
+def reference_rewrite(worker, raw):
+    """
+    The rewrite stage of reference_tokens alone: the tokens
+    worker.process_tokens(raw) should return, for the list `raw` of regex
+    stage tokens and a worker made by `new_worker` (used up by the call).
+    """
+    rules = type(worker).get_rewrite_rules()
+    nows = [i for i, t in enumerate(raw) if t[1] is not Token.Text]
+    behind = []
+    ans = []
+    for i, curr in enumerate(raw):
+        start = bisect.bisect_right(nows, i)
+        # process_tokens keeps one more token ahead when curr is text
+        size = worker.lookahead + (curr[1] is Token.Text)
+        worker.nows_queue = collections.deque(raw[j] for j in nows[start:start+size])
+        worker.processed = collections.deque(behind[-worker.lookbehind:], worker.lookbehind)
+        out = _reference_rewrite(worker, rules, curr)
+        if out is None: continue
+        if out[1] is not Token.Text:
+            behind.append(out)
+        ans.append(out)
+    return ans
+
+def _reference_rewrite(worker, rules, curr):
+    curr_idx, curr_token, curr_value = curr
+    for rule_type, rule_values, action in rules:
+        if rule_type is not None and rule_type is not curr_token: continue
+        if rule_values is not None and curr_value not in rule_values: continue
+        if not callable(action):
+            return (curr_idx, action, curr_value)
+        ans = action(worker, curr)
+        if ans is not None:
+            return ans
+    return curr
+
+class ReferenceSunnyLexer(RedLexerBase):
+    """
+    SunnyLexer as it was before the Sunny keywords moved into its state
+    machine: plain CoffeeScript tokens, rewritten afterwards.
+    """
+    name = 'Sunny (reference)'
+
+    CLASS_GEN_KEYWORDS = ['record', 'abstract', 'event', 'machine', 'user', 'client', 'server', 'policy', 'write_policy', 'read_policy']
+    FUN_KEYWORDS = ['simport', 'set', 'compose', 'seq']
+    SYM_KEYWORDS = ['requires', 'ensures', 'from', 'to', 'params', 'read', 'update', 'create', 'destroy', 'delete', '_precondition', 'precondition', 'push', 'pull', 'find']
+    SYM_COLON_KEYWORDS = [(s + ":") for s in SYM_KEYWORDS]
+    AUX_FUNS = ['map', 'filter', 'filterNot', 'fold', 'findFirst', 'contains', 'remove', 'some', 'all', 'containsAll', 'allow', 'deny', 'equals']
+    EXTRA_KEYWORDS = CLASS_GEN_KEYWORDS + FUN_KEYWORDS
+
+    tokens = dict(CoffeeScriptLexer.tokens)
+
+    @classmethod
+    def get_rewrite_rules(cls):
+        return [
+            (None, cls.EXTRA_KEYWORDS, cls.keyword_unless_member),
+            (None, None, cls.sym_colon_keyword),
+            (None, cls.AUX_FUNS, Name.Builtin.Pseudo),
+        ]
+
+    def keyword_unless_member(self, curr):
+        if _value(self.prev()) not in ["."]:
+            return (_idx(curr), Keyword.Pseudo, _value(curr))
+
+    def sym_colon_keyword(self, curr):
+        if _value(curr).strip() in self.SYM_COLON_KEYWORDS:
+            return (_idx(curr), Keyword.Pseudo, _value(curr))
+
+class ReferenceHandlebarsLexer(RegexLexer):
+    """
+    HandlebarsLexer as it was before it became a find-based scanner. It
+    gives the same tokens (once adjacent `Other` tokens are merged) for
+    texts without raw blocks and multi-line comments, which it did not
+    support.
+    """
+    name = 'Handlebars (reference)'
+
+    tokens = {
+        'root': [
+            (r'[^{]+', Other),
+            (r'{{!.*}}', Comment),
+            (r'({{{)(\s*)', bygroups(Comment.Special, Text), 'tag'),
+            (r'({{)(\s*)', bygroups(Comment.Preproc, Text), 'tag'),
+        ],
+        'tag': [
+            (r'\s+', Text),
+            (r'\}\}\}', Comment.Special, '#pop'),
+            (r'\}\}', Comment.Preproc, '#pop'),
+            (r'([\#/]*)(each|if|unless|else|with|log|in)', bygroups(Keyword, Keyword)),
+            (r'([\#/])(\w+)', bygroups(Name.Function, Name.Function)),
+            (r'(\w+)(=)', bygroups(Name.Attribute, Operator)),
+            (r':?"(\\\\|\\"|[^"])*"', String.Double),
+            (r":?'(\\\\|\\'|[^'])*'", String.Single),
+            (r'[a-zA-Z][a-zA-Z0-9_-]*', Name.Variable),
+            (r'\.[a-zA-Z0-9_]+', Name.Variable),
+            (r"[0-9](\.[0-9]*)?(eE[+-][0-9])?[flFLdD]?|"
+             r"0[xX][0-9a-fA-F]+[Ll]?", Number),
+        ]
+    }
+
+    @staticmethod
+    def applies_to(text):
+        # no raw blocks, no "{" on its own (an error here) and every comment
+        # ends on its line, before any other "}}" there (it took all of them)
+        return ('{{{{' not in text and not re.search(r'(?<!\{)\{(?!\{)', text) and
+                all('}}' in c and '\n' not in c.split('}}')[0] and '}}' not in c.split('}}', 1)[1].split('\n')[0]
+                    for c in text.split('{{!')[1:]))
+
+def _merged(tokens):
+    # (token type, value) pairs with adjacent tokens of the same type merged
+    ans = []
+    for _, token, value in tokens:
+        if not value: continue
+        if ans and ans[-1][0] is token:
+            ans[-1] = (token, ans[-1][1] + value)
+        else:
+            ans.append((token, value))
+    return ans
+
+"""
+--------------------------------------------------------------------------------
+  Checks. Each one takes a lexer and a text and returns None, or a
+  description of what went wrong.
+--------------------------------------------------------------------------------
+"""
+
+def _first_difference(expected, actual):
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return 'token %d: expected %r, got %r' % (i, a, b)
+    return '%d tokens expected, got %d' % (len(expected), len(actual))
+
+def check_text(lexer, text):
+    """
+    The values of the tokens must add up to the text, at their offsets.
+    """
+    pos = 0
+    for index, token, value in lexer.get_tokens_unprocessed(text):
+        if index != pos:
+            return 'token %r at %d, expected at %d' % (value, index, pos)
+        if text[pos:pos+len(value)] != value:
+            return 'token %r at %d does not match the text %r' % (value, pos, text[pos:pos+len(value)])
+        pos += len(value)
+    if pos != len(text):
+        return 'text lost after %d of %d characters: %r' % (pos, len(text), text[pos:pos+40])
+
+def check_reference(lexer, text):
+    """
+    The optimized tokens must be those of the reference implementation:
+    reference_tokens for RedLexerBase lexers, the plain pygments code paths
+    for the delegating and ERB lexers, the previous implementations for
+    Sunny and Handlebars.
+    """
+    actual = list(lexer.get_tokens_unprocessed(text))
+    if isinstance(lexer, pygments_red.SunnyLexer):
+        expected = list(ReferenceSunnyLexer().get_tokens_unprocessed(text))
+    elif isinstance(lexer, pygments_red.HandlebarsLexer):
+        if not ReferenceHandlebarsLexer.applies_to(text):
+            return None
+        expected = _merged(ReferenceHandlebarsLexer().get_tokens_unprocessed(text))
+        actual = _merged(actual)
+    elif isinstance(lexer, RedLexerBase):
+        expected = reference_tokens(lexer, text)
+    elif isinstance(lexer, RedDelegatingLexer):
+        expected = list(DelegatingLexer.get_tokens_unprocessed(lexer, text))
+    elif isinstance(lexer, RedErbLexer):
+        expected = list(ErbLexer.get_tokens_unprocessed(lexer, text))
+    else:
+        return None
+    if actual != expected:
+        return 'differs from the reference: ' + _first_difference(expected, actual)
+
+def check_batch(lexer, text):
+    """
+    Lexing pieces of the text in one batch must give the tokens of lexing
+    each one alone.
+    """
+    if not isinstance(lexer, RedLexerBase):
+        return None
+    lines = text.splitlines(True)
+    pieces = [''.join(lines[i:i+7]) for i in range(0, len(lines), 7)]
+    pieces += pieces[:2]
+    for piece, tokens in zip(pieces, lexer.get_tokens_unprocessed_batch(pieces)):
+        expected = list(lexer.get_tokens_unprocessed(piece))
+        if tokens != expected:
+            return 'batch differs for %r: %s' % (piece[:40], _first_difference(expected, tokens))
+
+def check_stream(lexer, text, rnd):
+    """
+    Streaming the text in random pieces, with a random chunk size, must give
+    the tokens of get_tokens_unprocessed.
+    """
+    if not isinstance(lexer, RedLexerBase):
+        return None
+    piece, chunk_size = rnd.randint(1, 200), rnd.randint(8, 512)
+    actual = list(lexer.get_tokens_unprocessed_stream(iter(text[i:i+piece] for i in range(0, len(text), piece)), chunk_size))
+    expected = list(lexer.get_tokens_unprocessed(text))
+    if actual != expected:
+        return 'streaming (pieces of %d, chunk size %d) differs: %s' % (piece, chunk_size,
+                                                                       _first_difference(expected, actual))
+
+def check_update(lexer, text, rnd):
+    """
+    update_tokens after a random edit must give the tokens of lexing the
+    edited text from scratch.
+    """
+    if not isinstance(lexer, RedLexerBase):
+        return None
+    tokens = list(lexer.get_tokens_unprocessed(text))
+    offset = rnd.randint(0, len(text))
+    deleted = rnd.randint(0, min(20, len(text) - offset))
+    inserted = text[rnd.randint(0, len(text)):][:rnd.randint(0, 20)]
+    new_text = text[:offset] + inserted + text[offset+deleted:]
+    actual = lexer.update_tokens(tokens, offset, deleted, inserted)
+    expected = list(lexer.get_tokens_unprocessed(new_text))
+    if actual != expected:
+        return 'update_tokens(%d, %d, %r) differs: %s' % (offset, deleted, inserted,
+                                                         _first_difference(expected, actual))
+
+def check_html(lexer, text):
+    """
+    Exported token streams must read back unchanged and render with
+    FastHtmlFormatter as with HtmlFormatter.
+    """
+    tokens = list(lexer.get_tokens(text))
+    stream = TokenStream.from_tokens(tokens)
+    if TokenStream.from_bytes(stream.to_bytes()) != stream or TokenStream.from_json(stream.to_json()) != stream:
+        return 'token stream export does not read back'
+    if ''.join(v for _, v in stream) != ''.join(v for _, v in tokens):
+        return 'token stream loses text'
+    expected = pygments.format(tokens, HtmlFormatter())
+    if pygments.format(stream, FastHtmlFormatter()) != expected:
+        return 'FastHtmlFormatter output differs from HtmlFormatter'
+
+"""
+--------------------------------------------------------------------------------
+  Golden token streams: a digest of the tokens of corpus(alias,
+  GOLDEN_SIZE, seed) for every lexer, and one per block of GOLDEN_BLOCK
+  tokens so that a change can be located. The digests depend on the
+  pygments version (the Ruby, CoffeeScript and HTML lexers come from it),
+  which is recorded with them.
+--------------------------------------------------------------------------------
+"""
+
+def _digest(tokens):
+    h = hashlib.sha256()
+    for _, token, value in tokens:
+        h.update(('%s\0%s\0' % (token, value)).encode('utf-8'))
+    return h.hexdigest()
+
+def golden_entry(alias, seed):
+    tokens = list(LEXERS[alias]().get_tokens_unprocessed(corpus(alias, GOLDEN_SIZE, seed)))
+    return {
+        'tokens': len(tokens),
+        'sha256': _digest(tokens),
+        'blocks': [_digest(tokens[i:i+GOLDEN_BLOCK])[:16] for i in range(0, len(tokens), GOLDEN_BLOCK)],
+    }
+
+def update_golden(path=GOLDEN):
+    data = {
+        'pygments': pygments.__version__,
+        'size': GOLDEN_SIZE,
+        'block': GOLDEN_BLOCK,
+        'lexers': dict((alias, dict((str(seed), golden_entry(alias, seed)) for seed in GOLDEN_SEEDS))
+                       for alias in sorted(LEXERS)),
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+def check_golden(aliases=None, path=GOLDEN):
+    """
+    Returns the failures of the golden token streams of `aliases` (default:
+    all lexers).
+    """
+    with open(path) as f:
+        data = json.load(f)
+    failures = []
+    note = ''
+    if data['pygments'] != pygments.__version__:
+        note = ' (golden.json was made with pygments %s, this is %s)' % (data['pygments'], pygments.__version__)
+    for alias in aliases or sorted(LEXERS):
+        for seed, golden in sorted(data['lexers'].get(alias, {}).items()):
+            entry = golden_entry(alias, int(seed))
+            if entry['sha256'] == golden['sha256']:
+                continue
+            blocks = [i for i, (a, b) in enumerate(zip(golden['blocks'], entry['blocks'])) if a != b]
+            where = ('first in tokens %d-%d' % (blocks[0] * data['block'], (blocks[0] + 1) * data['block'] - 1)
+                     if blocks else '%d tokens instead of %d' % (entry['tokens'], golden['tokens']))
+            failures.append('%s: golden tokens of seed %s changed, %s%s' % (alias, seed, where, note))
+        if alias not in data['lexers']:
+            failures.append('%s: no golden tokens, run with --update' % alias)
+    return failures
+
+def check_paths(aliases=None):
+    """
+    Streaming and parallel lexing of the golden corpora, and of corpora
+    with heredocs, multi-line strings and comments mixed in, must give the
+    tokens of get_tokens_unprocessed.
+    """
+    failures = []
+    for alias in aliases or sorted(LEXERS):
+        lexer = LEXERS[alias]()
+        if not isinstance(lexer, RedLexerBase):
+            continue
+        for name, text in [('', corpus(alias, GOLDEN_SIZE, GOLDEN_SEEDS[0])),
+                           (' (multi-line)', multiline_corpus(alias, GOLDEN_SIZE, GOLDEN_SEEDS[0]))]:
+            expected = list(lexer.get_tokens_unprocessed(text))
+            streamed = list(lexer.get_tokens_unprocessed_stream(iter(text[i:i+500] for i in range(0, len(text), 500)), 1024))
+            if streamed != expected:
+                failures.append('%s: streaming differs%s: %s' % (alias, name, _first_difference(expected, streamed)))
+            if hasattr(lexer, 'jobs'):
+                parallel = lexer.get_tokens_unprocessed_parallel(text, 2, 4096)
+                if parallel != expected:
+                    failures.append('%s: parallel lexing differs%s: %s' % (alias, name, _first_difference(expected, parallel)))
+    return failures
+
+"""
+--------------------------------------------------------------------------------
+  Fuzzing: snippets of the corpus of a lexer and MULTILINE snippets,
+  mutated by cutting, copying and inserting atoms (quotes, brackets, template tags, the keywords of the
+  lexer, ...).
+--------------------------------------------------------------------------------
+"""
+
+def _multiline_ruby(rnd):
+    a, b, c = _ident(rnd), _ident(rnd, True), _ident(rnd)
+    return ('def %s\n'
+            '  s = <<-EOS\n'
+            '  record %s do\n'
+            '  "%s\n'
+            '  EOS\n'
+            '  t = "first #{%s}\n'
+            'record %s do\n'
+            'last"\n'
+            '=begin\n'
+            "record %s do '%s\n"
+            '=end\n'
+            '  u = %%w(%s\n'
+            '%s)\n'
+            '  f(<<~A, <<B)\n'
+            '  %s\n'
+            '  A\n'
+            'record %s do\n'
+            'B\n'
+            'end\n\n') % (a, b, c, a, b, b, c, a, c, a, b)
+
+def _multiline_sunny(rnd):
+    r, f = _ident(rnd, True), _ident(rnd)
+    return ('###\n'
+            'record %s { ###\n'
+            '%s = """\n'
+            'record %s {\n'
+            '#{%s}\n'
+            '"""\n'
+            "%s = '\n"
+            'event %s {\n'
+            "'\n"
+            '%s = ///\n'
+            '  %s\n'
+            '///\n\n') % (r, f, r, f, f, r, f, f)
+
+# snippets with heredocs, strings and comments that span lines (which the
+# benchmark corpora do not have), for the lexers that stream
+MULTILINE = {
+    'ruby193': _multiline_ruby,
+    'arby':    _multiline_ruby,
+    'red':     _multiline_ruby,
+    'slang':   _multiline_ruby,
+    'sunny':   _multiline_sunny,
+}
+
+def multiline_corpus(alias, size, seed=0):
+    """
+    Like bench.corpus, with a MULTILINE snippet every third one.
+    """
+    rnd = random.Random('%s/multiline/%d' % (alias, seed))
+    parts = []
+    n = 0
+    while n < size:
+        gen = MULTILINE[alias] if alias in MULTILINE and len(parts) % 3 == 2 else GENERATORS[alias]
+        parts.append(gen(rnd))
+        n += len(parts[-1])
+    return ''.join(parts)
+
+ATOMS = ['"', "'", '`', '/', '\\', '#', '#{', '}', '{', '(', ')', '[', ']', ',', '.', ':', '::', '=', '=>',
+         '\n', ' ', '  ', '\t', '<', '>', '<%', '%>', '<%=', '{{', '}}', '{{{', '}}}', '{{!', '{{#each',
+         '<<EOS\n', '\nEOS\n', '%w(', '?a', '@x', '$y', 'do', 'end', 'x', 'X', '1', '1.5', '->', '###', '"""']
+
+def atoms(lexer):
+    """
+    ATOMS, plus the words of the keyword lists or dialect of `lexer` (and
+    of the lexers it delegates to).
+    """
+    ans = list(ATOMS)
+    for obj in [lexer, getattr(lexer, 'ruby_lexer', None), getattr(lexer, 'root_lexer', None)]:
+        for name in dir(type(obj)) if obj is not None else []:
+            value = getattr(obj, name)
+            if name.isupper() and isinstance(value, list) and all(isinstance(v, str) for v in value):
+                ans.extend(value)
+        dialect = getattr(obj, 'dialect', None)
+        if dialect is not None:
+            ans.extend(sorted(dialect.keywords))
+            ans.extend(sorted(w for _, words in dialect.names for w in words))
+    return ans
+
+def mutate(rnd, text, words):
+    for _ in range(rnd.randint(1, 6)):
+        i = rnd.randint(0, len(text))
+        op = rnd.random()
+        if op < 0.3:
+            text = text[:i] + text[i+rnd.randint(1, 30):]
+        elif op < 0.5:
+            j = rnd.randint(0, len(text))
+            text = text[:i] + text[j:j+rnd.randint(1, 60)] + text[i:]
+        else:
+            text = text[:i] + ''.join(rnd.choice(words) for _ in range(rnd.randint(1, 4))) + text[i:]
+    return text
+
+def fuzz(alias, count=100, seed=0):
+    """
+    Runs every check on `count` fuzzed inputs for `alias`; returns the
+    failures, with the input that caused them.
+    """
+    lexer = LEXERS[alias]()
+    words = atoms(lexer)
+    rnd = random.Random('%s/%d' % (alias, seed))
+    failures = []
+    for n in range(count):
+        gens = [GENERATORS[alias]] * 2 + [MULTILINE.get(alias, GENERATORS[alias])]
+        base = ''.join(rnd.choice(gens)(rnd) for _ in range(rnd.randint(1, 4)))
+        text = mutate(rnd, base, words) if n % 4 else base
+        for check in [check_text, check_reference, check_batch, check_html,
+                      lambda lexer, text: check_stream(lexer, text, rnd),
+                      lambda lexer, text: check_update(lexer, text, rnd)]:
+            try:
+                problem = check(lexer, text)
+            except Exception as e:
+                problem = 'raises %s: %s' % (type(e).__name__, e)
+            if problem:
+                failures.append('%s: %s\n    input: %r' % (alias, problem, text))
+    return failures
+
+"""
+--------------------------------------------------------------------------------
+  Superlinear time: every lexer is timed on one long line of each
+  ADVERSARIAL unit, at two sizes; lexing TIME_FACTOR times more text must
+  not take much more than TIME_FACTOR times longer. KNOWN lists the cases
+  that are reported, but not as failures.
+--------------------------------------------------------------------------------
+"""
+
+ADVERSARIAL = ['"', "'", '`', '/', '\\', '#{', '{', '(', '[', '<', '<%', '{{', '{{!', '%w(', '<<A\n', ':', '::',
+               'a', 'a.', 'a,', ' ', '\n', '@', '$', '?', '=>', '->', '"#{', 'record A ', 'sig ', 'x:']
+
+# the comment and assignment rules of pygments' CoffeeScriptLexer scan to
+# the end of the line from every position they are tried at
+KNOWN = {
+    ('sunny', '#{'): 'CoffeeScriptLexer comments, quadratic in the line length',
+    ('sunny', 'a.'): 'CoffeeScriptLexer assignments, quadratic in the line length',
+    ('sunny', 'x:'): 'CoffeeScriptLexer assignments, quadratic in the line length',
+}
+
+TIME_SIZE = 2000
+TIME_FACTOR = 4
+TIME_SLACK = 2.5
+
+def _lex_time(lexer, text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in lexer.get_tokens_unprocessed(text): pass
+        d = time.perf_counter() - t
+        if best is None or d < best:
+            best = d
+        if d > 0.2: break
+    return best
+
+def check_timing(alias, units=None, known=None):
+    """
+    Returns the failures of `alias` on `units` (default: ADVERSARIAL); the
+    KNOWN ones go to the list `known` instead.
+    """
+    lexer = LEXERS[alias]()
+    failures = []
+    for unit in units or ADVERSARIAL:
+        small = unit * (TIME_SIZE // len(unit))
+        t1 = _lex_time(lexer, small)
+        t2 = _lex_time(lexer, small * TIME_FACTOR)
+        # below a few milliseconds the timings are noise
+        if t2 > 0.005 and t2 > TIME_SLACK * TIME_FACTOR * max(t1, 1e-4):
+            problem = ('%s: superlinear on %r: %.1f ms for %d characters, %.1f ms for %d'
+                       % (alias, unit, 1e3 * t1, len(small), 1e3 * t2, len(small) * TIME_FACTOR))
+            if (alias, unit) in KNOWN:
+                if known is not None:
+                    known.append('%s (known: %s)' % (problem, KNOWN[alias, unit]))
+            else:
+                failures.append(problem)
+    return failures
+
+# ----------------------------------------------------
+
+def run(aliases=None, count=100, seed=0, timing=True, out=None):
+    aliases = aliases or sorted(LEXERS)
+    failures = []
+    def report(name, found):
+        failures.extend(found)
+        if out is not None:
+            out.write('%-8s %s\n' % (name, 'ok' if not found else '%d failures' % len(found)))
+    report('golden', check_golden(aliases))
+    report('paths', check_paths(aliases))
+    for alias in aliases:
+        report('fuzz', fuzz(alias, count, seed))
+    known = []
+    if timing:
+        for alias in aliases:
+            report('timing', check_timing(alias, known=known))
+    if out is not None:
+        for problem in known:
+            out.write(problem + '\n')
+    return failures
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='pygments_red.verify',
+                                     description='Check the pygments_red lexers against golden tokens and reference implementations.')
+    parser.add_argument('--lexer', action='append', choices=sorted(LEXERS), help='only these lexers')
+    parser.add_argument('--fuzz', type=int, default=100, metavar='N', help='fuzzed inputs per lexer')
+    parser.add_argument('--seed', type=int, default=0, help='fuzzing seed')
+    parser.add_argument('--no-timing', action='store_true', help='skip the superlinear time checks')
+    parser.add_argument('--update', action='store_true', help='rewrite golden.json from the current lexers')
+    opts = parser.parse_args(args)
+
+    if opts.update:
+        update_golden()
+        return 0
+    failures = run(opts.lexer, opts.fuzz, opts.seed, not opts.no_timing, sys.stdout)
+    for failure in failures:
+        sys.stdout.write(failure + '\n')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,24 +15,32 @@ setup(
     url='https://github.com/aleksandarmilicevic/pygments-red',
 
     packages=find_packages(),
-    install_requires=['pygments >= 1.4'],
+    package_data={'pygments_red': ['golden.json']},
+    python_requires='>=3.7',
+    install_requires=['pygments >= 2.14'],
 
     entry_points='''[pygments.lexers]
-                    ruby193=pygments_red:Ruby193Lexer
-                    arby=pygments_red:ARbyLexer
-                    red=pygments_red:RedLexer
-                    sunny=pygments_red:SunnyLexer
-                    handlebars=pygments_red:HandlebarsLexer
-                    html+handlebars=pygments_red:HandlebarsHtmlLexer
-                    slang=pygments_red:SlangLexer
-                    errb=pygments_red:ErrbLexer
-                    ered=pygments_red:EredLexer
-                    redhtml=pygments_red:RedHtmlLexer
+                    ruby193=pygments_red.ruby:Ruby193Lexer
+                    arby=pygments_red.ruby:ARbyLexer
+                    red=pygments_red.ruby:RedLexer
+                    sunny=pygments_red.sunny:SunnyLexer
+                    handlebars=pygments_red.handlebars:HandlebarsLexer
+                    html+handlebars=pygments_red.handlebars:HandlebarsHtmlLexer
+                    slang=pygments_red.ruby:SlangLexer
+                    errb=pygments_red.erb:ErrbLexer
+                    ered=pygments_red.erb:EredLexer
+                    redhtml=pygments_red.erb:RedHtmlLexer
 
                     [pygments.styles]
-                    redstyle=pygments_red:RedStyle
-                    github=pygments_red:GithubStyle
-                    githubcustom=pygments_red:GithubCustom1Style''',
+                    redstyle=pygments_red.redstyle:RedStyle
+                    github=pygments_red.styles:GithubStyle
+                    githubcustom=pygments_red.styles:GithubCustom1Style
+
+                    [pygments.formatters]
+                    fasthtml=pygments_red.htmlformat:FastHtmlFormatter
+
+                    [console_scripts]
+                    pygments_red=pygments_red.cli:main''',
 
     classifiers=[
     ],
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+    HighlightCache: eviction, the sqlite store, encoded output, and keys
+    that tell lexers and styles apart.
+"""
+import pygments
+from pygments.formatters import HtmlFormatter
+
+import pygments_red
+from pygments_red.cache import HighlightCache
+
+CODE = 'record User do\n  name: String\nend\n'
+ERB = '<p><%= render :user %></p>\n'
+
+
+def test_lru():
+    cache = HighlightCache(maxsize=2)
+    lexer = pygments_red.RedLexer()
+    for text in ['a = 1\n', 'b = 2\n', 'a = 1\n', 'c = 3\n']:
+        cache.get_tokens(text, lexer)
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.get_tokens('a = 1\n', lexer)
+    cache.get_tokens('b = 2\n', lexer)
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.stats()['entries'] == 2
+
+def test_maxbytes():
+    cache = HighlightCache(maxbytes=2 * len(CODE))
+    lexer = pygments_red.RedLexer()
+    for i in range(3):
+        cache.get_tokens(CODE + '#%d\n' % i, lexer)
+    assert cache.stats()['entries'] == 1
+    assert cache.nbytes <= cache.maxbytes
+
+def test_copies():
+    cache = HighlightCache()
+    lexer = pygments_red.RedLexer()
+    tokens = cache.get_tokens(CODE, lexer)
+    tokens.append('junk')
+    assert cache.get_tokens(CODE, lexer) == list(lexer.get_tokens(CODE))
+
+def test_sqlite(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    lexer, formatter = pygments_red.RedLexer(), HtmlFormatter()
+    cache = HighlightCache(path=path)
+    tokens = cache.get_tokens(CODE, lexer)
+    html = cache.highlight(CODE, lexer, formatter)
+    cache.close()
+    cache = HighlightCache(path=path)
+    assert cache.get_tokens(CODE, lexer) == tokens
+    assert cache.highlight(CODE, lexer, formatter) == html
+    assert (cache.hits, cache.disk_hits, cache.misses) == (2, 2, 0)
+    cache.close()
+
+def test_bytes(tmp_path):
+    lexer, formatter = pygments_red.RedLexer(), HtmlFormatter(encoding='utf-8')
+    expected = pygments.highlight(CODE, lexer, formatter)
+    assert isinstance(expected, bytes)
+    for path in [None, str(tmp_path / 'cache.db')]:
+        cache = HighlightCache(path=path)
+        assert cache.highlight(CODE, lexer, formatter) == expected
+        assert cache.highlight(CODE, lexer, formatter) == expected
+        assert cache.nbytes == len(expected)
+        cache.close()
+    cache = HighlightCache(path=str(tmp_path / 'cache.db'))
+    assert cache.highlight(CODE, lexer, formatter) == expected
+    assert cache.disk_hits == 1
+
+def test_keys():
+    cache = HighlightCache()
+    formatter = HtmlFormatter()
+    for cls in [pygments_red.EredLexer, pygments_red.ErrbLexer]:
+        assert cache.highlight(ERB, cls(), formatter) == pygments.highlight(ERB, cls(), formatter)
+    assert cache.hits == 0
+    lexer = pygments_red.RedLexer()
+    for style in [pygments_red.RedStyle, pygments_red.GithubStyle]:
+        formatter = HtmlFormatter(style=style)
+        assert cache.highlight(CODE, lexer, formatter) == pygments.highlight(CODE, lexer, formatter)
+    assert cache.hits == 0
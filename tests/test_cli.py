@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+    The pygments_red command: unchanged files are skipped by the manifest,
+    a file that fails does not stop the others, inputs that would be
+    written to the same output fail, and the files of registered and
+    configured dialects are highlighted.
+"""
+import os
+import sys
+import json
+import subprocess
+
+from pygments_red import cli, dialects
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE = 'record User do\n  name: String\nend\n'
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def manifest(out):
+    with open(os.path.join(out, cli.MANIFEST)) as f:
+        return json.load(f)['files']
+
+def test_manifest(tmp_path, capsys):
+    src, out = str(tmp_path / 'src'), str(tmp_path / 'out')
+    write(os.path.join(src, 'a.red'), CODE.encode('utf-8'))
+    write(os.path.join(src, 'sub', 'b.red'), CODE.encode('utf-8'))
+    assert cli.main([src, '-o', out, '-j', '2']) == 0
+    assert os.path.exists(os.path.join(out, 'sub', 'b.red.html'))
+    assert len(manifest(out)) == 2
+    capsys.readouterr()
+    assert cli.main([src, '-o', out, '-j', '1']) == 0
+    assert capsys.readouterr().err.startswith('0 files highlighted, 2 unchanged, 0 failed')
+
+def test_failure(tmp_path, capsys):
+    src, out = str(tmp_path / 'src'), str(tmp_path / 'out')
+    write(os.path.join(src, 'bad.red'), b'record \xff\n')
+    write(os.path.join(src, 'good.red'), CODE.encode('utf-8'))
+    assert cli.main([src, '-o', out, '-j', '1']) == 1
+    err = capsys.readouterr().err
+    assert 'bad.red: UnicodeDecodeError' in err
+    assert '1 files highlighted, 0 unchanged, 1 failed' in err
+    assert os.path.exists(os.path.join(out, 'good.red.html'))
+    assert [os.path.basename(p) for p in manifest(out)] == ['good.red']
+
+def test_collision(tmp_path, capsys):
+    d1, d2, out = str(tmp_path / 'd1'), str(tmp_path / 'd2'), str(tmp_path / 'out')
+    write(os.path.join(d1, 'm.red'), CODE.encode('utf-8'))
+    write(os.path.join(d2, 'm.red'), CODE.encode('utf-8'))
+    write(os.path.join(d2, 'n.red'), CODE.encode('utf-8'))
+    assert cli.main([d1, d2, d1, '-o', out, '-j', '1']) == 1
+    err = capsys.readouterr().err
+    assert err.count('is also the output of') == 2
+    assert '1 files highlighted, 0 unchanged, 2 failed' in err
+    assert not os.path.exists(os.path.join(out, 'm.red.html'))
+    assert [os.path.basename(p) for p in manifest(out)] == ['n.red']
+
+def test_registered(tmp_path, capsys):
+    dialects.register('clired', {'name': 'CliRed', 'extends': 'red', 'filenames': ['*.clired']})
+    src, out = str(tmp_path / 'src'), str(tmp_path / 'out')
+    write(os.path.join(src, 'm.clired'), CODE.encode('utf-8'))
+    assert cli.main([src, '-o', out, '-j', '2']) == 0
+    assert os.path.exists(os.path.join(out, 'm.clired.html'))
+
+def test_configured(tmp_path):
+    src, out = str(tmp_path / 'src'), str(tmp_path / 'out')
+    write(os.path.join(src, 'm.envcli'), CODE.encode('utf-8'))
+    path = str(tmp_path / 'dialects.json')
+    with open(path, 'w') as f:
+        json.dump({'envcli': {'name': 'EnvCli', 'extends': 'red', 'filenames': ['*.envcli']}}, f)
+    env = dict(os.environ, PYGMENTS_RED_DIALECTS=path,
+               PYTHONPATH=os.pathsep.join([ROOT] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    subprocess.check_call([sys.executable, '-m', 'pygments_red.cli', src, '-o', out, '-j', '1'], env=env, cwd=ROOT)
+    assert os.path.exists(os.path.join(out, 'm.envcli.html'))
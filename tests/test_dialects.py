@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+    Lexers of registered dialects must load where the dialect was never
+    registered: pickled instances in spawned processes, and the class by
+    name (what a pygments entry point does) from $PYGMENTS_RED_DIALECTS.
+"""
+import os
+import sys
+import json
+import pickle
+import subprocess
+import multiprocessing
+
+from pygments_red import dialects
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE = 'record Tenant do\n  audit :name\nend\n'
+
+def tokens(lexer):
+    return [(str(token), value) for token, value in lexer.get_tokens(CODE)]
+
+def test_pickle_spawn():
+    cls = dialects.register('testred', {'name': 'TestRed', 'extends': 'red',
+                                        'keywords': {'mine': ['audit']}})
+    assert dialects.TestRedLexer is cls
+    lexer = cls()
+    assert type(pickle.loads(pickle.dumps(lexer))) is cls
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        assert pool.apply(tokens, (lexer,)) == tokens(lexer)
+
+def test_configured(tmp_path):
+    path = tmp_path / 'dialects.json'
+    path.write_text(json.dumps({'envred': {'name': 'EnvRed', 'extends': 'red', 'aliases': ['envred']}}))
+    code = 'from pygments_red.dialects import EnvRedLexer\nprint(EnvRedLexer.aliases[0])'
+    env = dict(os.environ, PYGMENTS_RED_DIALECTS=str(path),
+               PYTHONPATH=os.pathsep.join([ROOT] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    out = subprocess.check_output([sys.executable, '-c', code], env=env, cwd=ROOT)
+    assert out.decode('utf-8').split() == ['envred']
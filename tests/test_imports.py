@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+    Importing the package, or one lexer or style from it, must only import
+    what that name needs (see pygments_red/__init__.py); each import runs in
+    a fresh interpreter.
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def modules_after(statement):
+    code = '%s\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))' % statement
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    out = subprocess.check_output([sys.executable, '-c', code], env=env, cwd=ROOT)
+    return set(json.loads(out.decode('utf-8').splitlines()[-1]))
+
+def test_package():
+    modules = modules_after('import pygments_red')
+    assert 'pygments.lexers.ruby' not in modules
+    assert 'pygments.lexers.templates' not in modules
+    assert not [m for m in modules if m.startswith('pygments_red.')]
+
+@pytest.mark.parametrize('statement, absent', [
+    ('from pygments_red import RedStyle', ['pygments.lexers.ruby', 'pygments.lexers.templates', 'pygments_red.ruby']),
+    ('from pygments_red import RedLexer', ['pygments.lexers.templates', 'pygments_red.erb', 'pygments_red.handlebars']),
+    ('from pygments_red import SunnyLexer', ['pygments.lexers.ruby', 'pygments.lexers.templates']),
+])
+def test_single_name(statement, absent):
+    modules = modules_after(statement)
+    assert [m for m in absent if m in modules] == []
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    One lexer instance shared by threads lexing different documents must
+    give every document the tokens of lexing it alone.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pygments_red import RedLexer, ARbyLexer
+from pygments_red.bench import corpus
+
+THREADS = 8
+DOCUMENTS = 32
+
+
+@pytest.mark.parametrize('cls, alias', [(RedLexer, 'red'), (ARbyLexer, 'arby')])
+def test_shared_lexer(cls, alias):
+    lexer = cls()
+    texts = [corpus(alias, 4000 + 500 * (seed % 5), seed) for seed in range(DOCUMENTS)]
+    expected = [list(lexer.get_tokens_unprocessed(text)) for text in texts]
+    with ThreadPoolExecutor(THREADS) as pool:
+        actual = list(pool.map(lambda text: list(lexer.get_tokens_unprocessed(text)), texts))
+    assert actual == expected
+
+def test_interleaved_generators():
+    lexer = RedLexer()
+    texts = [corpus('red', 3000, seed) for seed in range(4)]
+    expected = [list(lexer.get_tokens_unprocessed(text)) for text in texts]
+    gens = [lexer.get_tokens_unprocessed(text) for text in texts]
+    actual = [[] for _ in texts]
+    done = False
+    while not done:
+        done = True
+        for tokens, gen in zip(actual, gens):
+            token = next(gen, None)
+            if token is not None:
+                tokens.append(token)
+                done = False
+    assert actual == expected
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+    The checks of pygments_red.verify, with a few fuzzed inputs per lexer
+    (the superlinear time checks are left to the command line, timings
+    being too noisy here).
+"""
+import json
+
+import pytest
+import pygments
+
+from pygments_red import verify
+from pygments_red.bench import LEXERS
+
+FUZZ = 10
+
+
+def test_golden():
+    # the golden tokens also depend on the Ruby, CoffeeScript and HTML lexers
+    # of the pygments version they were made with
+    with open(verify.GOLDEN) as f:
+        made_with = json.load(f)['pygments']
+    if made_with != pygments.__version__:
+        pytest.skip('golden.json was made with pygments %s, this is %s' % (made_with, pygments.__version__))
+    assert verify.check_golden() == []
+
+def test_paths():
+    assert verify.check_paths() == []
+
+@pytest.mark.parametrize('alias', sorted(LEXERS))
+def test_fuzz(alias):
+    assert verify.fuzz(alias, FUZZ) == []